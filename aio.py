@@ -0,0 +1,302 @@
+# aio.py
+
+import asyncio
+import time
+from typing import Union, Tuple, List
+from urllib.parse import urlencode
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import pylangtoolwrapper as pylt
+from cache import CheckCache, make_key
+from entities import Error
+import fastjson
+from instrumentation import Hooks
+from whitelist import Whitelist
+
+__doc__ = """asyncio flavour of the wrapper, needs `aiohttp`
+Same functions and return values of `pylangtoolwrapper`, but awaitable
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class AsyncLanguageToolClient:
+    """
+    Reusable asyncio connection to the LanguageTool API.
+
+    The `aiohttp.ClientSession` is opened on the first request, so the client
+    can be built outside of a running event loop. It is opened again when
+    used from another event loop, i.e. by a later `asyncio.run()`
+    """
+
+    def __init__(self, base_url: Union[str, None] = None,
+                 pool_size: int = 10, keep_alive: bool = True,
+                 timeout: Union[float, Tuple[float, float], None] = (5, 60),
+                 ua: Union[str, None] = None,
+                 max_in_flight: Union[int, None] = None,
+                 cache: Union[CheckCache, None] = None,
+                 hooks: Union[Hooks, None] = None):
+        """
+        :param base_url: API root, defaults to `ROUTES['base']`
+        :param pool_size: max connections kept open
+        :param keep_alive: if `False` every connection is closed after the
+                           response
+        :param timeout: seconds, either a single value or a
+                        (connect, read) tuple, `None` waits forever
+        :param ua: user agent string
+        :param max_in_flight: max requests running at the same time, `None`
+                              for no limit
+        :param cache: where to keep the check results, see `cache`
+        :param hooks: `instrumentation.Hooks`, see `LanguageToolClient`
+        """
+        if aiohttp is None:
+            raise pylt.PyLangToolWrapperException(
+                'aiohttp is required for the asyncio API')
+        self.base_url = base_url or pylt.ROUTES['base']
+        self.cache = cache
+        self.hooks = hooks
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        if isinstance(timeout, tuple):
+            self._timeout = aiohttp.ClientTimeout(connect=timeout[0],
+                                                  sock_read=timeout[1])
+        else:
+            self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._headers = {'user-agent': ua or pylt.USER_AGENT}
+        self._max_in_flight = max_in_flight
+        self._in_flight = None
+        self._session = None
+        self._loop = None
+
+    async def __aenter__(self) -> 'AsyncLanguageToolClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Release the pooled connections"""
+        if self._session is not None:
+            if self._loop is asyncio.get_running_loop():
+                await self._session.close()
+            else:
+                self._session.detach()
+            self._session = None
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # session and semaphore belong to the loop they were made in
+            if self._session is not None and not self._session.closed:
+                self._session.detach()
+            self._session = None
+            self._loop = loop
+            self._in_flight = (asyncio.Semaphore(self._max_in_flight)
+                               if self._max_in_flight else None)
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_size, force_close=not self._keep_alive
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=self._headers,
+                timeout=self._timeout
+            )
+        return self._session
+
+    def url(self, route: str) -> str:
+        """Full endpoint for `route`, one of the `ROUTES` keys"""
+        return f"{self.base_url}{pylt.ROUTES[route]}"
+
+    async def request(self, url: str, verb: str = 'GET',
+                      payload: Union[dict, None] = None,
+                      ua: Union[str, None] = None):
+        """
+        Manage request
+        :param url: the API REST endpoint
+        :param verb:
+        :param payload: paramenters for request
+        :param ua: user agent string, overrides the session one
+        :return: decoded json response
+        :raise PyLangToolWrapperRetryableException: connection failed or
+                                                     timed out
+        :raise PyLangToolWrapperFatalException: any other `aiohttp` error
+        """
+        return fastjson.loads(await self._send(url, verb, payload, ua))
+
+    async def _send(self, url: str, verb: str, payload: Union[dict, None],
+                    ua: Union[str, None]) -> bytes:
+        """:return: the body of the response"""
+        headers = {'user-agent': ua} if ua else None
+        if verb not in ('GET', 'POST'):
+            raise pylt.PyLangToolWrapperException(
+                'not a valid verb for this API')
+        session = self._get_session()
+        hooks = self.hooks
+        status = None
+        body = b''
+        if self._in_flight is not None:
+            await self._in_flight.acquire()
+        if hooks is not None:
+            start = time.perf_counter()
+        try:
+            async with session.request(verb, url, headers=headers,
+                                       data=payload) as r:
+                status = r.status
+                body = await r.read()
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                asyncio.TimeoutError) as exc:
+            # as `LanguageToolClient`: a connection reset while reading the
+            # body is a payload error
+            raise pylt.PyLangToolWrapperRetryableException(
+                f"{exc.__class__.__name__}: {exc}") from exc
+        except aiohttp.ClientError as exc:
+            raise pylt.PyLangToolWrapperFatalException(
+                f"{exc.__class__.__name__}: {exc}") from exc
+        finally:
+            if self._in_flight is not None:
+                self._in_flight.release()
+            if hooks is not None:
+                hooks.on_request(url, verb, status,
+                                 time.perf_counter() - start,
+                                 len(urlencode(payload or {})), len(body))
+        if status != 200:
+            raise pylt.PyLangToolWrapperException(
+                f"Error {status}\n{body.decode('utf-8', 'replace')}")
+        return body
+
+    async def get_languages(self) -> List[pylt.Language]:
+        """
+        Get available languages
+        :return: list
+        """
+        return pylt._parse_languages(await self.request(self.url('languages')))
+
+    async def fetch_matches(self, text: str, lang_code: str,
+                            options: Union[dict, None] = None) -> List[dict]:
+        """
+        Send a single check request, `text` must fit in one request.
+        If the client has a cache the request is sent only on a cache miss
+        :param text: the text to check
+        :param lang_code: language code
+        :param options: other request parameters
+        :return: raw `matches` from the response
+        """
+        url = self.url('check')
+        hooks = self.hooks
+        key = None
+        if self.cache is not None:
+            key = make_key(text, lang_code, url, options)
+            matches = self.cache.get(key)
+            if hooks is not None:
+                hooks.on_cache(matches is not None)
+            if matches is not None:
+                if hooks is not None:
+                    hooks.on_matches(lang_code, len(text), len(matches))
+                return matches
+        payload = {'text': text, 'language': lang_code, **(options or {})}
+        body = await self._send(url, 'POST', payload, None)
+        if hooks is None:
+            matches = fastjson.loads(body).get('matches', list())
+        else:
+            start = time.perf_counter()
+            matches = fastjson.loads(body).get('matches', list())
+            hooks.on_decode(len(body), time.perf_counter() - start)
+            hooks.on_matches(lang_code, len(text), len(matches))
+        if key is not None:
+            self.cache.set(key, matches)
+        return matches
+
+    async def check(self, text: str, lang_code: str, whitelist=None,
+                    max_chars_per_req: int = 20000,
+                    chunk: bool = False,
+                    options: Union[dict, None] = None) -> List[Error]:
+        """
+        Send `text` for the spell check with `language`, see `check()`
+        :return: list of `Error` objects
+        """
+        check_chars, len_chars = pylt._check_chars_for_req(
+            text, max_chars_per_req)
+        if check_chars and not chunk:
+            raise pylt.PyLangToolWrapperException(
+                f"Too many characters in text\nAllowed: {max_chars_per_req})\n"
+                f"Present: {len_chars}")
+
+        chunks = (pylt.split_text(text, max_chars_per_req) if check_chars
+                  else [(0, text)])
+
+        async def fetch(offset: int, piece: str) -> List[dict]:
+            return pylt._rebase(
+                await self.fetch_matches(piece, lang_code, options), offset
+            )
+
+        results = await asyncio.gather(
+            *(fetch(offset, piece) for offset, piece in chunks)
+        )
+        matches = [match for result in results for match in result]
+        if self.hooks is None:
+            return Error.parse({'matches': matches}, whitelist or list())
+        start = time.perf_counter()
+        errors = Error.parse({'matches': matches}, list())
+        parsed = time.perf_counter()
+        whitelist = Whitelist.coerce(whitelist)
+        if whitelist:
+            Error.update_whitelisted(errors, whitelist)
+        self.hooks.on_parse(len(errors), parsed - start,
+                            time.perf_counter() - parsed)
+        return errors
+
+
+_client: Union[AsyncLanguageToolClient, None] = None
+
+
+def get_client() -> AsyncLanguageToolClient:
+    """
+    The client shared by the module level coroutines, created on first use
+    :return: `AsyncLanguageToolClient`
+    """
+    global _client
+    if _client is None:
+        _client = AsyncLanguageToolClient()
+    return _client
+
+
+def set_client(client: Union[AsyncLanguageToolClient, None]):
+    """
+    Replace the shared client. With `None` a default one will be created on
+    next use. The replaced client is not closed
+    :param client: `AsyncLanguageToolClient` or `None`
+    """
+    global _client
+    _client = client
+
+
+async def get_languages() -> List[pylt.Language]:
+    """
+    Get available languages
+    :return: list
+    """
+    return await get_client().get_languages()
+
+
+async def check(text: str, lang_code: str, whitelist=None,
+                max_chars_per_req: int = 20000,
+                chunk: bool = False,
+                options: Union[dict, None] = None) -> List[Error]:
+    """
+    Send `text` for the spell check with `language`, see
+    `pylangtoolwrapper.check()`. With `chunk` the pieces are sent
+    concurrently, within the client `max_in_flight` limit
+    :return: list of `Error` objects
+    """
+    return await get_client().check(text, lang_code, whitelist,
+                                    max_chars_per_req, chunk, options)
+
+
+if __name__ == '__main__':
+    pass
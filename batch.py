@@ -0,0 +1,228 @@
+# batch.py
+
+from typing import Union, Dict, Iterable, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import pylangtoolwrapper as pylt
+from entities import Error
+from whitelist import Whitelist
+
+__doc__ = """Columnar storage of many check results for bulk statistics, needs
+`numpy`
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+# Columns that can be grouped by `ErrorBatch.count_by()`
+GROUPS = ('rule', 'category', 'issue_type', 'document')
+
+
+def _text_error(match: dict) -> str:
+    """Same as `Error.text_error` from the raw json"""
+    context = match.get('context')
+    if not context:
+        return ''
+    start = context['offset']
+    return context['text'][start:start + context['length']]
+
+
+class _Codes:
+    """Map strings to small integer codes"""
+
+    def __init__(self):
+        self.names: List[str] = list()
+        self._codes: Dict[str, int] = dict()
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def get(self, name: str) -> int:
+        return self._codes.get(name, -1)
+
+
+class ErrorBatch:
+    """
+    Errors of one or many check responses stored as typed arrays: offset,
+    length, rule, category, issue type, document and whitelisted flag.
+    Filters and counts work on the whole arrays, the `Error` objects are
+    built again only by `to_errors()`
+    """
+
+    def __init__(self, columns: dict, codes: Dict[str, _Codes],
+                 sources: list):
+        """
+        Use `from_responses()` or `from_errors()`
+        :param columns: name -> numpy array, all of the same length
+        :param codes: group name -> strings of the coded columns
+        :param sources: raw match or `Error` for each row
+        """
+        self._columns = columns
+        self._codes = codes
+        self._sources = sources
+
+    @staticmethod
+    def _new_codes() -> Dict[str, _Codes]:
+        if np is None:
+            raise pylt.PyLangToolWrapperException(
+                'numpy is required for ErrorBatch')
+        return {'rule': _Codes(), 'category': _Codes(),
+                'issue_type': _Codes()}
+
+    @classmethod
+    def _build(cls, rows: List[tuple], codes: Dict[str, _Codes],
+               sources: list) -> 'ErrorBatch':
+        fields = list(zip(*rows)) if rows else [()] * 7
+        columns = {
+            'offset': np.array(fields[0], dtype=np.int64),
+            'length': np.array(fields[1], dtype=np.int32),
+            'rule': np.array(fields[2], dtype=np.int32),
+            'category': np.array(fields[3], dtype=np.int32),
+            'issue_type': np.array(fields[4], dtype=np.int16),
+            'document': np.array(fields[5], dtype=np.int32),
+            'whitelisted': np.array(fields[6], dtype=np.bool_),
+        }
+        return cls(columns, codes, sources)
+
+    @classmethod
+    def from_responses(cls, responses: Iterable[dict],
+                       whitelist=None) -> 'ErrorBatch':
+        """
+        :param responses: decoded check responses, the position of each one
+                          is its `document` number
+        :param whitelist: words to ignore, see `Error.parse()`
+        :return: `ErrorBatch`
+        """
+        codes = cls._new_codes()
+        whitelist = Whitelist.coerce(whitelist)
+        rows = list()
+        sources = list()
+        for document, response in enumerate(responses):
+            for match in response.get('matches', ()):
+                rule = match.get('rule') or dict()
+                category = rule.get('category') or dict()
+                whitelisted = bool(whitelist) and whitelist.matches(
+                    _text_error(match), rule.get('id'))
+                rows.append((
+                    match['offset'], match['length'],
+                    codes['rule'].code(rule.get('id', '')),
+                    codes['category'].code(category.get('id', '')),
+                    codes['issue_type'].code(rule.get('issueType', '')),
+                    document, whitelisted
+                ))
+                sources.append(match)
+        return cls._build(rows, codes, sources)
+
+    @classmethod
+    def from_errors(cls, errors: Iterable[Error],
+                    document: int = 0) -> 'ErrorBatch':
+        """
+        :param errors: `Error` objects, i.e. returned by `check()`
+        :param document: document number of all the `errors`
+        :return: `ErrorBatch`
+        """
+        codes = cls._new_codes()
+        rows = list()
+        sources = list()
+        for error in errors:
+            start, _, length = error.absolute_position()
+            category = error.rule.category.id if error.rule else ''
+            rows.append((
+                start, length,
+                codes['rule'].code(error.rule_id),
+                codes['category'].code(category),
+                codes['issue_type'].code(error.issue_type),
+                document, error.is_whitelisted
+            ))
+            sources.append(error)
+        return cls._build(rows, codes, sources)
+
+    def __len__(self):
+        return len(self._sources)
+
+    def column(self, name: str) -> 'np.ndarray':
+        """
+        :param name: offset, length, rule, category, issue_type, document or
+                     whitelisted; the grouping columns hold codes, see
+                     `names()`
+        :return: the array (not a copy)
+        """
+        return self._columns[name]
+
+    def names(self, group: str) -> List[str]:
+        """
+        :param group: one of `GROUPS` but `document`
+        :return: the string for each code of the `group` column
+        """
+        return list(self._codes[group].names)
+
+    def filter(self, mask: 'np.ndarray') -> 'ErrorBatch':
+        """
+        :param mask: boolean array, one item for each error
+        :return: a new `ErrorBatch` with the errors where `mask` is `True`
+        """
+        columns = {name: values[mask]
+                   for name, values in self._columns.items()}
+        sources = [self._sources[pos] for pos in np.flatnonzero(mask)]
+        return ErrorBatch(columns, self._codes, sources)
+
+    def spell_errors(self) -> 'ErrorBatch':
+        """Same as `Error.spell_errors()`"""
+        code = self._codes['issue_type'].get('misspelling')
+        return self.filter(self._columns['issue_type'] == code)
+
+    def whitelist_filtered(self) -> 'ErrorBatch':
+        """Same as `Error.whitelist_filtered()`"""
+        return self.filter(~self._columns['whitelisted'])
+
+    def count_by(self, group: str) -> Dict[Union[str, int], int]:
+        """
+        Number of errors for each value of `group`
+        :param group: one of `GROUPS`
+        :return: dict value -> count, documents are numbers
+        """
+        values = self._columns[group]
+        if group == 'document':
+            found, counts = np.unique(values, return_counts=True)
+            return dict(zip(found.tolist(), counts.tolist()))
+        names = self._codes[group].names
+        counts = np.bincount(values, minlength=len(names))
+        return {name: int(count) for name, count in zip(names, counts)
+                if count}
+
+    def offset_histogram(self, bucket: int = 1000) -> Dict[int, int]:
+        """
+        Number of errors every `bucket` characters
+        :param bucket: bucket size in characters
+        :return: dict bucket start offset -> count
+        """
+        found, counts = np.unique(self._columns['offset'] // bucket,
+                                  return_counts=True)
+        return dict(zip((found * bucket).tolist(), counts.tolist()))
+
+    def to_errors(self, keep_data: bool = True) -> List[Error]:
+        """
+        :param keep_data: see `Error.parse()`
+        :return: the `Error` objects of the batch
+        """
+        errors = list()
+        for source, whitelisted in zip(self._sources,
+                                       self._columns['whitelisted']):
+            error = (source if isinstance(source, Error)
+                     else Error(source, keep_data))
+            error.is_whitelisted = bool(whitelisted)
+            errors.append(error)
+        return errors
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,143 @@
+# bench_client.py
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pylangtoolwrapper as pylt
+from entities import Error, SKIPPABLE_FIELDS
+import fastjson
+from mockserver import MockLanguageTool, make_matches
+
+__doc__ = """Measure the client against the local mock server, no network:
+
+- `check()` throughput and p50/p99 latency per document
+- json decoding (standard library and `fastjson`) and `Error.parse` cost
+  per match
+- memory held by 10k parsed errors, with and without the skipped fields
+
+    python benchmarks/bench_client.py [--docs 200] [--chars 5000]
+        [--workers 4] [--latency 0.02]
+"""
+
+_SENTENCE = ('Questa è una frase di prova per misurare il client, '
+             'con qualche parola sbagliata qua e là. ')
+
+
+def _text(chars: int) -> str:
+    return (_SENTENCE * (chars // len(_SENTENCE) + 1))[:chars]
+
+
+def _percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def bench_check(base_url: str, docs: int, chars: int, workers: int,
+                max_chars_per_req: int) -> dict:
+    """
+    Check `docs` documents of `chars` chars, `workers` at the same time
+    :return: documents/s, chars/s, p50 and p99 seconds per document
+    """
+    client = pylt.LanguageToolClient(base_url, pool_size=workers,
+                                     languages_file=None)
+    text = _text(chars)
+    latencies = list()
+
+    def one(_):
+        start = time.perf_counter()
+        client.check(text, 'it', max_chars_per_req=max_chars_per_req,
+                     chunk=True)
+        latencies.append(time.perf_counter() - start)
+
+    one(None)  # warm up the connection
+    latencies.clear()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(one, range(docs)))
+    elapsed = time.perf_counter() - start
+    client.close()
+    return {'docs/s': docs / elapsed, 'chars/s': docs * chars / elapsed,
+            'p50': _percentile(latencies, 50),
+            'p99': _percentile(latencies, 99)}
+
+
+def _body(count: int) -> bytes:
+    """:return: a check response with `count` matches"""
+    matches = make_matches(_text(count * 100), match_every=80)[:count]
+    assert len(matches) == count
+    return json.dumps({'matches': matches}).encode('utf-8')
+
+
+def _per_match(func, matches: int, runs: int = 5) -> float:
+    """:return: microseconds for a match"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / (runs * matches) * 1e6
+
+
+def bench_decode(matches: int) -> dict:
+    """:return: decoder name -> microseconds to decode a match"""
+    body = _body(matches)
+    return {name: _per_match(lambda: loads(body), matches)
+            for name, loads in (('json', json.loads),
+                                (fastjson.DECODER, fastjson.loads))}
+
+
+def bench_parse(matches: int) -> float:
+    """:return: microseconds to build the `Error` of a decoded match"""
+    data = json.loads(_body(matches))
+    return _per_match(lambda: Error.parse(data, list()), matches)
+
+
+def bench_memory(count: int = 10000, keep_data: bool = True,
+                 skip=()) -> int:
+    """:return: bytes held by `count` parsed errors"""
+    body = _body(count)
+    gc.collect()
+    tracemalloc.start()
+    errors = Error.parse(fastjson.loads(body), list(), keep_data, skip)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del errors
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--docs', type=int, default=200)
+    parser.add_argument('--chars', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-chars', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added by the mock server')
+    args = parser.parse_args()
+
+    with MockLanguageTool(latency=args.latency) as server:
+        result = bench_check(server.base_url, args.docs, args.chars,
+                             args.workers, args.max_chars)
+    print(f"check: {result['docs/s']:.1f} docs/s, "
+          f"{result['chars/s']:.0f} chars/s, "
+          f"p50 {result['p50'] * 1000:.2f}ms, "
+          f"p99 {result['p99'] * 1000:.2f}ms")
+    for name, usec in bench_decode(10000).items():
+        print(f'decode ({name}): {usec:.2f} usec/match')
+    print(f'Error.parse: {bench_parse(10000):.2f} usec/match')
+    for keep_data, skip in ((True, ()), (False, ()),
+                            (False, SKIPPABLE_FIELDS)):
+        size = bench_memory(10000, keep_data, skip)
+        print(f'memory, 10k errors (keep_data={keep_data}, '
+              f'skip={",".join(sorted(skip)) or "-"}): '
+              f'{size / 1024 / 1024:.2f} MiB, {size / 10000:.0f} bytes/error')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# bench_whitelist.py
+
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import Error
+from whitelist import Whitelist
+
+__doc__ = """Time `Error.update_whitelisted` growing both the whitelist and the
+errors: with a linear behaviour the time per error stays flat.
+
+    python benchmarks/bench_whitelist.py [max size, default 100000]
+"""
+
+
+def _matches(count: int) -> list:
+    matches = list()
+    for pos in range(count):
+        word = f'Parola{pos}'
+        matches.append({
+            'message': '', 'offset': pos * 10, 'length': len(word),
+            'context': {'text': f'la {word} qui', 'offset': 3,
+                        'length': len(word)}
+        })
+    return matches
+
+
+def run(size: int) -> float:
+    """
+    :param size: words in the whitelist and errors to scan, half of the
+                 errors are whitelisted
+    :return: seconds
+    """
+    whitelist = Whitelist(f'parola{pos}' for pos in range(0, 2 * size, 2))
+    errors = Error.parse({'matches': _matches(size)}, list())
+    start = time.perf_counter()
+    Error.update_whitelisted(errors, whitelist)
+    elapsed = time.perf_counter() - start
+    assert sum(error.is_whitelisted for error in errors) == size // 2
+    return elapsed
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"{'size':>10} {'seconds':>10} {'usec/error':>12}")
+    size = top // 8
+    while size <= top:
+        elapsed = run(size)
+        print(f'{size:>10} {elapsed:>10.4f} {elapsed / size * 1e6:>12.3f}')
+        size *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+# cache.py
+
+import argparse
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Union, List
+
+import fastjson
+
+__doc__ = """Caches for the check results.
+The raw `matches` of a response are stored, keyed by a hash of the text and
+of everything else that can change the response, and rebuilt as `Error`
+objects by the client, so the whitelist is applied after the lookup
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+def make_key(text: str, lang_code: str, url: str,
+             options: Union[dict, None] = None) -> str:
+    """
+    Cache key for a check request
+    :param text: the text to check
+    :param lang_code: language code
+    :param url: the API REST endpoint
+    :param options: other request parameters (rules enabled/disabled, ...)
+    :return: hex digest
+    """
+    data = json.dumps([text, lang_code, url, options or dict()],
+                      sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class CheckCache:
+    """
+    Base class for the caches, counts hits and misses (safe to share among
+    threads)
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._counts_lock = threading.Lock()
+
+    def get(self, key: str) -> Union[List[dict], None]:
+        """
+        :param key: see `make_key()`
+        :return: the stored `matches`, `None` if not found
+        """
+        value = self._get(key)
+        with self._counts_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if value is None else fastjson.loads(value)
+
+    def set(self, key: str, matches: List[dict]):
+        """
+        Store `matches` under `key`
+        :param key: see `make_key()`
+        :param matches: raw `matches` from a check response
+        """
+        self._set(key, json.dumps(matches, ensure_ascii=False))
+
+    def clear(self):
+        """Remove all the entries"""
+        raise NotImplementedError
+
+    def _get(self, key: str) -> Union[str, bytes, None]:
+        """:return: the stored json, `str` or utf-8 `bytes`"""
+        raise NotImplementedError
+
+    def _set(self, key: str, value: str):
+        raise NotImplementedError
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class MemoryCache(CheckCache):
+    """In-process cache, the least recently used entries are evicted first"""
+
+    def __init__(self, max_entries: int = 1024,
+                 max_bytes: Union[int, None] = None):
+        """
+        :param max_entries: max number of responses kept
+        :param max_bytes: max size of the stored responses (utf-8 json),
+                          `None` for no limit
+        """
+        CheckCache.__init__(self)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _get(self, key: str) -> Union[bytes, None]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: str):
+        value = value.encode('utf-8')  # so that `size` counts bytes
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self.size += len(value)
+            while self._entries and (
+                    len(self._entries) > self.max_entries or
+                    (self.max_bytes is not None and
+                     self.size > self.max_bytes)):
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class SqliteCache(CheckCache):
+    """
+    On disk cache, can be shared by several processes (sqlite in WAL mode).
+    Expired entries are ignored and removed, when the stored responses grow
+    over the limits the least recently used ones are removed
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+    """
+
+    def __init__(self, path: str, ttl: Union[float, None] = None,
+                 max_entries: Union[int, None] = None,
+                 max_bytes: Union[int, None] = None,
+                 prune_every: int = 100, timeout: float = 30):
+        """
+        :param path: the database file, created if missing
+        :param ttl: seconds an entry is valid, `None` never expires
+        :param max_entries: max number of responses kept, `None` for no limit
+        :param max_bytes: max size of the stored responses (utf-8 json),
+                          `None` for no limit
+        :param prune_every: the limits are enforced every `prune_every`
+                            stored entries, see also `prune()`
+        :param timeout: seconds to wait for a lock held by another process
+        """
+        CheckCache.__init__(self)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._prune_every = prune_every
+        self._timeout = timeout
+        self._stored = 0
+        self._local = threading.local()
+        # (owner thread, connection) of the open connections, to close them
+        # all; a thread holding one of an older generation opens a new one
+        self._conns = list()
+        self._conns_lock = threading.Lock()
+        self._generation = 0
+        with self._connect() as conn:
+            conn.executescript(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection for each thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.generation != self._generation:
+            # only the owner thread uses it, `close()` may come from another
+            conn = sqlite3.connect(self.path, timeout=self._timeout,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with self._conns_lock:
+                self._close_orphans()
+                self._conns.append((threading.current_thread(), conn))
+                self._local.generation = self._generation
+            self._local.conn = conn
+        return conn
+
+    def _close_orphans(self):
+        """
+        Close the connections of the finished threads, i.e. the workers of a
+        thread pool, they never close their own. Call with `_conns_lock`
+        """
+        alive = list()
+        for thread, conn in self._conns:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._conns = alive
+
+    def close(self):
+        """
+        Close the connections of all the threads, a thread using the cache
+        afterwards opens a new one
+        """
+        with self._conns_lock:
+            conns, self._conns = self._conns, list()
+            self._generation += 1
+        for _, conn in conns:
+            conn.close()
+
+    def __len__(self):
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries')
+        self._connect().execute('VACUUM')
+
+    def _get(self, key: str) -> Union[str, None]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT value, created FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and row[1] < now - self.ttl:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE entries SET accessed = ? WHERE key = ?',
+                         (now, key))
+        return row[0]
+
+    def _set(self, key: str, value: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries '
+                '(key, value, size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, value, len(value.encode('utf-8')), now, now)
+            )
+        self._stored += 1
+        if self._stored % self._prune_every == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Remove the expired entries, then the least recently used ones until
+        the cache is within `max_entries` and `max_bytes`
+        :return: number of removed entries
+        """
+        removed = 0
+        with self._connect() as conn:
+            if self.ttl is not None:
+                removed += conn.execute(
+                    'DELETE FROM entries WHERE created < ?',
+                    (time.time() - self.ttl,)
+                ).rowcount
+            if self.max_entries is not None:
+                removed += conn.execute(
+                    'DELETE FROM entries WHERE key IN ('
+                    'SELECT key FROM entries ORDER BY accessed DESC '
+                    'LIMIT -1 OFFSET ?)', (self.max_entries,)
+                ).rowcount
+            if self.max_bytes is not None:
+                # Keep the most recently used entries fitting in max_bytes
+                removed += conn.execute(
+                    'DELETE FROM entries WHERE key IN ('
+                    'SELECT key FROM (SELECT key, SUM(size) OVER '
+                    '(ORDER BY accessed DESC, key) AS total FROM entries) '
+                    'WHERE total > ?)', (self.max_bytes,)
+                ).rowcount
+        return removed
+
+    def stats(self) -> dict:
+        """
+        :return: entries, stored bytes, oldest and newest entry timestamps
+        """
+        count, size, oldest, newest = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created), '
+            'MAX(created) FROM entries'
+        ).fetchone()
+        return {'entries': count, 'bytes': size, 'oldest': oldest,
+                'newest': newest, 'file_bytes': os.path.getsize(self.path)}
+
+
+def _format_ts(ts: Union[float, None]) -> str:
+    if ts is None:
+        return '-'
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    """
+    Command line to inspect and prune a `SqliteCache`
+    :param argv: arguments, defaults to `sys.argv[1:]`
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog='cache.py', description='Manage an on disk check cache')
+    parser.add_argument('command', choices=('stats', 'prune', 'clear'))
+    parser.add_argument('path', help='the cache database file')
+    parser.add_argument('--ttl', type=float, default=None,
+                        help='prune: remove entries older than TTL seconds')
+    parser.add_argument('--max-entries', type=int, default=None,
+                        help='prune: keep at most MAX_ENTRIES entries')
+    parser.add_argument('--max-bytes', type=int, default=None,
+                        help='prune: keep at most MAX_BYTES of responses')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f'{args.path}: no such file', file=sys.stderr)
+        return 1
+    store = SqliteCache(args.path, ttl=args.ttl,
+                        max_entries=args.max_entries,
+                        max_bytes=args.max_bytes)
+    if args.command == 'prune':
+        print(f'{store.prune()} entries removed')
+    elif args.command == 'clear':
+        store.clear()
+        print('cache cleared')
+    stats = store.stats()
+    print(f"entries:  {stats['entries']}\n"
+          f"stored:   {stats['bytes']} bytes\n"
+          f"on disk:  {stats['file_bytes']} bytes\n"
+          f"oldest:   {_format_ts(stats['oldest'])}\n"
+          f"newest:   {_format_ts(stats['newest'])}")
+    store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
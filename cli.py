@@ -0,0 +1,243 @@
+# cli.py
+
+import argparse
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed)
+from fnmatch import fnmatch
+import glob
+import json
+import os
+import sys
+import time
+from typing import Union, List, Tuple
+
+import dedup
+import pylangtoolwrapper as pylt
+from entities import Error
+from whitelist import Whitelist
+
+__doc__ = """Command line interface
+
+    python -m pylangtoolwrapper check -l it docs/ notes/*.txt > errors.jsonl
+
+Every error is a json line on stdout, the summary goes to stderr
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+def expand_paths(paths: List[str], pattern: str = '*.txt') -> List[str]:
+    """
+    :param paths: files, glob patterns or directories (scanned recursively
+                  for files matching `pattern`)
+    :param pattern: file name pattern for the directories
+    :return: file names, without duplicates
+    """
+    found = dict()
+    for path in paths:
+        if any(char in path for char in '*?['):
+            names = sorted(glob.glob(path, recursive=True))
+        else:
+            names = [path]
+        for name in names:
+            if os.path.isdir(name):
+                for folder, _, files in os.walk(name):
+                    for fn in sorted(files):
+                        if fnmatch(fn, pattern):
+                            found[os.path.join(folder, fn)] = None
+            else:
+                found[name] = None
+    return list(found)
+
+
+def _init_worker(base_url: Union[str, None], pool_size: int):
+    pylt.set_client(pylt.LanguageToolClient(base_url, pool_size=pool_size))
+
+
+def check_path(path: str, lang_code: str, whitelist: Whitelist,
+               max_chars_per_req: int = 20000,
+               misspelling_only: bool = False,
+               ignore_whitelisted: bool = False
+               ) -> Tuple[str, List[dict], int, float, Union[str, None]]:
+    """
+    Check a file, to be run in a worker thread or process
+    :return: (path, error records, chars checked, seconds, failure message
+             or `None`)
+    """
+    start = time.perf_counter()
+    try:
+        with open(path, encoding='utf-8', errors='replace') as fh:
+            text = fh.read()
+        errors = pylt.check(text, lang_code, whitelist, max_chars_per_req,
+                            chunk=True)
+    except (OSError, pylt.PyLangToolWrapperException) as exc:
+        return path, list(), 0, time.perf_counter() - start, str(exc)
+    records = _records(path, errors, misspelling_only, ignore_whitelisted)
+    return path, records, len(text), time.perf_counter() - start, None
+
+
+def _records(path: str, errors: List[Error], misspelling_only: bool,
+             ignore_whitelisted: bool) -> List[dict]:
+    if misspelling_only:
+        errors = Error.spell_errors(errors)
+    if ignore_whitelisted:
+        errors = Error.whitelist_filtered(errors)
+    records = list()
+    for error in errors:
+        offset, _, length = error.absolute_position()
+        records.append({
+            'path': path, 'offset': offset, 'length': length,
+            'rule': error.rule_id, 'suggestions': error.suggestions,
+            'word': error.text_error, 'whitelisted': error.is_whitelisted
+        })
+    return records
+
+
+def _write(records: List[dict]):
+    for record in records:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False))
+        sys.stdout.write('\n')
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _load_whitelist(fn: Union[str, None]) -> Whitelist:
+    """The entries of the file can be patterns, see `whitelist.py`"""
+    if not fn:
+        return Whitelist()
+    with open(fn, encoding='utf-8') as fh:
+        return Whitelist(fh.read().split('\n'))
+
+
+def run_check_dedup(args: argparse.Namespace, files: List[str],
+                    whitelist: Whitelist) -> int:
+    """Check all the `files` together, each distinct sentence once"""
+    _init_worker(args.base_url, args.workers)
+    start = time.perf_counter()
+    texts = list()
+    try:
+        for path in files:
+            with open(path, encoding='utf-8', errors='replace') as fh:
+                texts.append(fh.read())
+        results, stats = dedup.check_deduplicated(
+            texts, args.lang, whitelist, max_chars_per_req=args.max_chars,
+            workers=args.workers
+        )
+    except (OSError, pylt.PyLangToolWrapperException) as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    found = 0
+    for path, errors in zip(files, results):
+        records = _records(path, errors, args.misspelling_only,
+                           args.ignore_whitelisted)
+        found += len(records)
+        _write(records)
+    elapsed = time.perf_counter() - start
+
+    print(f'files: {len(files)}, errors: {found}, '
+          f'chars: {stats.chars}, time: {elapsed:.2f}s\n'
+          f'sentences: {stats.sentences}, unique: {stats.unique}, '
+          f'dedup ratio: {dedup.dedup_ratio(stats):.1%}, '
+          f'chars sent: {stats.sent_chars}', file=sys.stderr)
+    return 0
+
+
+def run_check(args: argparse.Namespace) -> int:
+    files = expand_paths(args.paths, args.pattern)
+    try:
+        whitelist = _load_whitelist(args.whitelist)
+    except (OSError, ValueError) as exc:
+        print(f'{args.whitelist}: {exc}', file=sys.stderr)
+        return 2
+    if args.dedup:
+        return run_check_dedup(args, files, whitelist)
+    if args.processes:
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers, initializer=_init_worker,
+            initargs=(args.base_url, 1)
+        )
+    else:
+        _init_worker(args.base_url, args.workers)
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+
+    start = time.perf_counter()
+    latencies = list()
+    chars = found = failed = 0
+    with executor:
+        futures = [
+            executor.submit(check_path, path, args.lang, whitelist,
+                            args.max_chars, args.misspelling_only,
+                            args.ignore_whitelisted)
+            for path in files
+        ]
+        for future in as_completed(futures):
+            path, records, checked, seconds, failure = future.result()
+            latencies.append(seconds)
+            if failure is not None:
+                failed += 1
+                print(f'{path}: {failure}', file=sys.stderr)
+                continue
+            chars += checked
+            found += len(records)
+            _write(records)
+    elapsed = time.perf_counter() - start
+
+    print(f'files: {len(files)} (failed {failed}), errors: {found}, '
+          f'chars: {chars}, time: {elapsed:.2f}s\n'
+          f'throughput: {len(files) / elapsed if elapsed else 0:.2f} files/s, '
+          f'{chars / elapsed if elapsed else 0:.0f} chars/s\n'
+          f'latency per file: p50 {_percentile(latencies, 50):.3f}s, '
+          f'p90 {_percentile(latencies, 90):.3f}s, '
+          f'max {max(latencies, default=0):.3f}s', file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    """
+    :param argv: arguments, defaults to `sys.argv[1:]`
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m pylangtoolwrapper',
+        description='LanguageTool API REST wrapper')
+    commands = parser.add_subparsers(dest='command', required=True)
+    cmd = commands.add_parser(
+        'check', help='check files, errors as json lines on stdout')
+    cmd.add_argument('paths', nargs='+',
+                     help='files, glob patterns or directories')
+    cmd.add_argument('-l', '--lang', required=True, help='language code')
+    cmd.add_argument('--pattern', default='*.txt',
+                     help='files to check in the directories (%(default)s)')
+    cmd.add_argument('--whitelist',
+                     help='file with an entry for each line, patterns '
+                          'allowed')
+    cmd.add_argument('--ignore-whitelisted', action='store_true',
+                     help='do not output the whitelisted errors')
+    cmd.add_argument('--misspelling-only', action='store_true',
+                     help='output the misspelling errors only')
+    cmd.add_argument('-w', '--workers', type=int, default=4,
+                     help='files checked at the same time (%(default)s)')
+    cmd.add_argument('--processes', action='store_true',
+                     help='use worker processes instead of threads')
+    cmd.add_argument('--dedup', action='store_true',
+                     help='read all the files and check each distinct '
+                          'sentence once')
+    cmd.add_argument('--max-chars', type=int, default=20000,
+                     help='chars for request (%(default)s)')
+    cmd.add_argument('--base-url', default=None,
+                     help=f"API root ({pylt.ROUTES['base']})")
+    args = parser.parse_args(argv)
+    if args.command == 'check':
+        return run_check(args)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
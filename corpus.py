@@ -0,0 +1,195 @@
+# corpus.py
+
+from collections import namedtuple
+import json
+import multiprocessing
+import os
+import time
+from typing import Union, Callable, Iterable, List, Set, Tuple
+
+import pylangtoolwrapper as pylt
+from whitelist import Whitelist
+
+__doc__ = """Check a large corpus of documents with a pool of processes.
+
+The results are appended to a checkpoint file (json lines), a run stopped
+for any reason skips the documents already there when started again
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+CorpusStats = namedtuple('CorpusStats', 'done skipped failed errors seconds')
+
+# Settings of the worker processes, see `_init_worker()`
+_worker = dict()
+
+
+def _init_worker(config: dict):
+    _worker.update(config)
+    pylt.set_client(pylt.LanguageToolClient(
+        config['base_url'], pool_size=config['threads']
+    ))
+
+
+def _check_document(task: Tuple[str, str]) -> Tuple[str, list, str]:
+    """
+    Check a document in a worker process
+    :param task: (document id, path)
+    :return: (document id, [[offset, length, rule id], ...], failure message
+             or empty string)
+    """
+    doc_id, path = task
+    try:
+        with open(path, encoding='utf-8', errors='replace') as fh:
+            text = fh.read()
+        errors = pylt.check(
+            text, _worker['lang_code'], _worker['whitelist'],
+            _worker['max_chars_per_req'], chunk=True,
+            workers=_worker['threads'], options=_worker['options']
+        )
+    except (OSError, pylt.PyLangToolWrapperException) as exc:
+        return doc_id, list(), str(exc) or exc.__class__.__name__
+    results = list()
+    for error in errors:
+        if _worker['ignore_whitelisted'] and error.is_whitelisted:
+            continue
+        offset, _, length = error.absolute_position()
+        results.append([offset, length, error.rule_id])
+    return doc_id, results, ''
+
+
+def read_checkpoint(checkpoint: str) -> Set[str]:
+    """
+    :param checkpoint: the checkpoint file
+    :return: ids of the documents checked without failures
+    """
+    done = set()
+    if not os.path.exists(checkpoint):
+        return done
+    with open(checkpoint, encoding='utf-8') as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # last line of an interrupted run
+            if not record.get('failed'):
+                done.add(record['id'])
+    return done
+
+
+def _repair_checkpoint(checkpoint: str):
+    """
+    Cut the torn last line left by an interrupted run, otherwise the next
+    record would be appended to it and both lost
+    :param checkpoint: the checkpoint file
+    """
+    try:
+        fh = open(checkpoint, mode='rb+')
+    except FileNotFoundError:
+        return
+    with fh:
+        end = pos = fh.seek(0, os.SEEK_END)
+        while pos > 0:
+            block = min(pos, 4096)
+            fh.seek(pos - block)
+            cut = fh.read(block).rfind(b'\n')
+            if cut >= 0:
+                pos += cut + 1 - block
+                break
+            pos -= block
+        if pos < end:
+            fh.truncate(pos)
+
+
+class CorpusRunner:
+    """
+    Distribute documents on a process pool.
+
+    The documents are dispatched largest first and one at a time, each
+    worker takes the next one as soon as it is free: the big documents start
+    early and the small ones fill the gaps, so no worker is left idle waiting
+    for a giant file. Inside a worker a document is split in chunks sent by
+    `threads` threads
+    """
+
+    def __init__(self, lang_code: str, checkpoint: str,
+                 processes: Union[int, None] = None, threads: int = 2,
+                 whitelist=None, ignore_whitelisted: bool = False,
+                 max_chars_per_req: int = 20000,
+                 options: Union[dict, None] = None,
+                 base_url: Union[str, None] = None):
+        """
+        :param lang_code: language code
+        :param checkpoint: json lines file where the results are appended
+        :param processes: worker processes, defaults to the number of CPUs
+        :param threads: chunks of a document sent at the same time
+        :param whitelist: `whitelist.Whitelist` or list of words to ignore
+        :param ignore_whitelisted: do not store the whitelisted errors
+        :param max_chars_per_req: chars allowed for request
+        :param options: other parameters for the API, see `check()`
+        :param base_url: API root, defaults to `ROUTES['base']`
+        """
+        self.checkpoint = checkpoint
+        self.processes = processes or os.cpu_count() or 1
+        self._config = {
+            'lang_code': lang_code, 'threads': threads,
+            'whitelist': Whitelist.coerce(whitelist),
+            'ignore_whitelisted': ignore_whitelisted,
+            'max_chars_per_req': max_chars_per_req, 'options': options,
+            'base_url': base_url
+        }
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def run(self, documents: Iterable[Tuple[str, str]],
+            on_result: Union[Callable[[str, list], None], None] = None
+            ) -> CorpusStats:
+        """
+        Check the `documents` not yet in the checkpoint
+        :param documents: (document id, path of an utf-8 text file)
+        :param on_result: called with (document id, errors) for each checked
+                          document, errors are [offset, length, rule id]
+        :return: `CorpusStats`
+        """
+        start = time.perf_counter()
+        done = read_checkpoint(self.checkpoint)
+        tasks: List[Tuple[str, str]] = list()
+        skipped = 0
+        for doc_id, path in documents:
+            if doc_id in done:
+                skipped += 1
+            else:
+                tasks.append((doc_id, path))
+        tasks.sort(key=lambda task: self._size(task[1]), reverse=True)
+
+        checked = failed = found = 0
+        _repair_checkpoint(self.checkpoint)
+        with open(self.checkpoint, mode='a', encoding='utf-8') as out, \
+                multiprocessing.Pool(self.processes, _init_worker,
+                                     (self._config,)) as pool:
+            for doc_id, errors, failure in pool.imap_unordered(
+                    _check_document, tasks, chunksize=1):
+                record = {'id': doc_id, 'errors': errors}
+                if failure:
+                    record['failed'] = failure
+                    failed += 1
+                else:
+                    checked += 1
+                    found += len(errors)
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+                if on_result is not None and not failure:
+                    on_result(doc_id, errors)
+        return CorpusStats(checked, skipped, failed, found,
+                           time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,107 @@
+# dedup.py
+
+from collections import namedtuple
+import hashlib
+import re
+from typing import Union, Dict, Iterable, List, Tuple
+
+import pylangtoolwrapper as pylt
+from entities import Error
+from whitelist import Whitelist
+
+__doc__ = """Check a corpus sending each distinct sentence only once.
+
+Disclaimers, signatures and legal footers repeat in many documents: the
+documents are split in sentences, every unique sentence is checked once and
+its errors are copied to each occurrence, moved to the right offset
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+DedupStats = namedtuple('DedupStats', 'sentences unique chars sent_chars')
+
+# A sentence ends with .!? (followed by a space) or at the end of the line
+_SENTENCE = re.compile(r'\S.*?(?:[.!?…]+(?=\s|\Z)|$)', re.MULTILINE)
+
+
+def split_sentences(text: str) -> List[Tuple[int, str]]:
+    """
+    Split `text` in sentences, the whitespace between them is left out
+    :param text:
+    :return: list of (offset of the sentence in `text`, sentence)
+    """
+    return [(match.start(), match.group().rstrip())
+            for match in _SENTENCE.finditer(text)]
+
+
+def _digest(sentence: str) -> bytes:
+    return hashlib.sha1(sentence.encode('utf-8')).digest()
+
+
+def dedup_ratio(stats: DedupStats) -> float:
+    """
+    :return: fraction of the sentences not sent thanks to the deduplication
+    """
+    if not stats.sentences:
+        return 0.0
+    return 1 - stats.unique / stats.sentences
+
+
+def check_deduplicated(texts: Iterable[str], lang_code: str, whitelist=None,
+                       client: Union['pylt.LanguageToolClient', None] = None,
+                       max_chars_per_req: int = 20000,
+                       options: Union[dict, None] = None,
+                       workers: int = 1
+                       ) -> Tuple[List[List[Error]], DedupStats]:
+    """
+    Check `texts` sending every distinct sentence once, the unique sentences
+    are packed together with `LanguageToolClient.fetch_many()`.
+    The errors spanning two sentences are not found
+    :param texts: the documents
+    :param lang_code: language code
+    :param whitelist: words to ignore, see `pylangtoolwrapper.check()`
+    :param client: `LanguageToolClient`, the shared one if `None`
+    :param max_chars_per_req: chars allowed for request
+    :param options: other parameters for the API, see `check()`
+    :param workers: requests sent at the same time
+    :return: (list of `Error` lists, one for each text in the same order,
+             `DedupStats`)
+    """
+    client = client or pylt.get_client()
+    whitelist = Whitelist.coerce(whitelist)
+    documents = list()
+    positions: Dict[bytes, int] = dict()
+    unique = list()
+    chars = 0
+    for text in texts:
+        occurrences = list()
+        for offset, sentence in split_sentences(text):
+            digest = _digest(sentence)
+            if digest not in positions:
+                positions[digest] = len(unique)
+                unique.append(sentence)
+            occurrences.append((offset, positions[digest]))
+            chars += len(sentence)
+        documents.append(occurrences)
+    positions.clear()
+
+    results = client.fetch_many(unique, lang_code, max_chars_per_req,
+                                options, workers)
+    stats = DedupStats(sum(len(doc) for doc in documents), len(unique),
+                       chars, sum(len(sentence) for sentence in unique))
+    del unique
+
+    errors = list()
+    for occurrences in documents:
+        matches = list()
+        for offset, pos in occurrences:
+            matches.extend(dict(match, offset=match['offset'] + offset)
+                           for match in results[pos])
+        errors.append(Error.parse({'matches': matches}, whitelist))
+    return errors, stats
+
+
+if __name__ == '__main__':
+    pass
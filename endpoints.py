@@ -0,0 +1,131 @@
+# endpoints.py
+
+import threading
+import time
+from typing import Callable, List
+
+__doc__ = """Spread the requests on several LanguageTool servers"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+ROUND_ROBIN = 'round_robin'
+LEAST_OUTSTANDING = 'least_outstanding'
+
+
+class Endpoint:
+    """A server and its current state"""
+
+    def __init__(self, url: str):
+        """
+        :param url: API root, i.e. `http://localhost:8081/v2/`
+        """
+        self.url = url
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+
+    def __repr__(self):
+        return (f'Endpoint({self.url!r}, outstanding={self.outstanding}, '
+                f'failures={self.failures})')
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class EndpointPool:
+    """
+    Choose the server for each request, round-robin or the one with the
+    least outstanding requests. A server failing `max_failures` requests in
+    a row is ejected for `eject_for` seconds, then it gets requests again
+    (a new failure ejects it again at once)
+    """
+
+    def __init__(self, urls: List[str], strategy: str = ROUND_ROBIN,
+                 max_failures: int = 3, eject_for: float = 30):
+        """
+        :param urls: API roots
+        :param strategy: `ROUND_ROBIN` or `LEAST_OUTSTANDING`
+        :param max_failures: consecutive failures ejecting a server
+        :param eject_for: seconds a server stays ejected
+        """
+        if not urls:
+            raise ValueError('at least an url is needed')
+        if strategy not in (ROUND_ROBIN, LEAST_OUTSTANDING):
+            raise ValueError(f'unknown strategy {strategy}')
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.eject_for = eject_for
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def acquire(self) -> Endpoint:
+        """
+        :return: the server for the next request, to give back with
+                 `release()`. If all are ejected, the first to come back
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [endpoint for endpoint in self.endpoints
+                          if endpoint.available(now)]
+            if not candidates:
+                endpoint = min(self.endpoints,
+                               key=lambda item: item.ejected_until)
+            elif self.strategy == LEAST_OUTSTANDING:
+                endpoint = min(candidates,
+                               key=lambda item: (item.outstanding,
+                                                 item.requests))
+            else:
+                endpoint = candidates[self._next % len(candidates)]
+                self._next += 1
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, ok: bool):
+        """
+        :param endpoint: from `acquire()`
+        :param ok: `False` if the server failed the request
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            self._update(endpoint, ok)
+
+    def _update(self, endpoint: Endpoint, ok: bool):
+        if ok:
+            endpoint.failures = 0
+            endpoint.ejected_until = 0.0
+            return
+        endpoint.failures += 1
+        if endpoint.failures >= self.max_failures:
+            endpoint.ejected_until = time.monotonic() + self.eject_for
+
+    def health_check(self, probe: Callable[[str], bool]):
+        """
+        Probe every server: the failing ones are ejected, the healthy ones
+        brought back
+        :param probe: called with the server url, `True` if healthy
+        """
+        for endpoint in self.endpoints:
+            try:
+                healthy = probe(endpoint.url)
+            except Exception:
+                healthy = False
+            with self._lock:
+                if healthy:
+                    self._update(endpoint, True)
+                else:
+                    endpoint.failures = max(endpoint.failures,
+                                            self.max_failures - 1)
+                    self._update(endpoint, False)
+
+
+if __name__ == '__main__':
+    pass
@@ -1,8 +1,8 @@
 # entities.py
 
-from typing import List, Union, Tuple
+from typing import Iterator, List, Union, Tuple
 
-import pylangtoolwrapper as pylt
+from whitelist import Whitelist
 
 
 __doc__ = """entities.py"""
@@ -11,55 +11,124 @@ __changelog__ = """
 
 """
 
+# Fields of a match that `Error` can leave out, see `Error.parse()`
+SKIPPABLE_FIELDS = frozenset(('context', 'urls', 'suggestions'))
+
 
 class Entity:
-    """A generic LanguageTool Object"""
-    def __init__(self, data: dict):
-        self._data = data
+    """
+    A generic LanguageTool Object.
+
+    The fields exposed by the properties are copied in slots when the object
+    is built, so the raw json `_data` can be dropped with `keep_data=False`
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data: dict, keep_data: bool = True):
+        self._data = data if keep_data else None
 
 
 class Error(Entity):
-    """Some sort of spell error"""
-    def __init__(self, data):
+    """
+    Some sort of spell error.
+
+    `Context` and `Rule` are built on first access, until then only their raw
+    json is kept. With `keep_data=False` they are built at once, so no json
+    is kept at all
+    """
+    __slots__ = ('is_whitelisted', '_context', '_rule', '_offset', '_length',
+                 '_message', '_message_short', '_suggestions', '_rule_id',
+                 '_issue_type', '_keep_data', '_text_error')
+
+    def __init__(self, data, keep_data: bool = True, skip=()):
+        Entity.__init__(self, data, keep_data)
         self.is_whitelisted = False
-        self._context = None
-        self._rule = None
-        Entity.__init__(self,  data)
-        if 'context' in self._data:
-            self._context = Context(self._data['context'])
-        if 'rule' in data:
-            self._rule = Rule(self._data['rule'])
+        self._keep_data = keep_data
+        self._offset = data['offset']
+        self._length = data['length']
+        self._message = data['message']
+        self._message_short = data.get('shortMessage', '')
+        self._suggestions = () if 'suggestions' in skip else tuple(
+            item['value'] for item in data.get('replacements', ())
+        )
+        self._context = data.get('context')
+        self._text_error = None
+        if 'context' in skip:
+            # the word is all that is kept of the context
+            self._text_error = self.text_error
+            self._context = None
+        elif self._context and not keep_data:
+            self._context = Context(self._context, keep_data)
+        rule = data.get('rule')
+        if 'urls' in skip and rule and 'urls' in rule:
+            rule = {key: value for key, value in rule.items()
+                    if key != 'urls'}
+        self._rule_id = rule['id'] if rule else ''
+        self._issue_type = rule.get('issueType', '') if rule else ''
+        if rule and not keep_data:
+            rule = Rule(rule, keep_data)
+        self._rule = rule
 
     @staticmethod
-    def parse(data: dict, whitelist: list) -> Union[None, List['Error']]:
+    def parse(data: dict, whitelist: Union[Whitelist, list],
+              keep_data: bool = True, skip=()) -> Union[None, List['Error']]:
         """
         Parse response from the spell check engine and istantiate a collection
         of `Error` objects
         :param data:
         :param whitelist: words to ignore if in errors `is_whitelisted` will
                           be set to `True`
+        :param keep_data: if `False` the raw json is not kept by the objects,
+                          saving memory on large responses
+        :param skip: fields not kept, among `SKIPPABLE_FIELDS`: 'context'
+                     (only `text_error` is kept, `context` is `None`),
+                     'urls' of the rule and 'suggestions'. Useful with
+                     `keep_data=False`
         :return: list
         """
         if 'matches' not in data:
             return None
-        errors = [Error(match) for match in data['matches']]
+        whitelist = Whitelist.coerce(whitelist)
+        errors = [Error(match, keep_data, skip) for match in data['matches']]
         if whitelist:
             errors = Error.update_whitelisted(errors, whitelist)
         return errors
 
     @staticmethod
-    def update_whitelisted(errors: list, whitelist: list) -> List['Error']:
+    def iter_parse(data: dict, whitelist: Union[Whitelist, list],
+                   keep_data: bool = True, skip=()) -> Iterator['Error']:
+        """
+        Like `parse()` but yields the `Error` objects one at a time, so a
+        pipeline discarding most of them never builds the whole list
+        :param data:
+        :param whitelist: words to ignore, see `parse()`
+        :param keep_data: see `parse()`
+        :param skip: see `parse()`
+        :return: generator of `Error`
+        """
+        whitelist = Whitelist.coerce(whitelist)
+        for match in data.get('matches', ()):
+            error = Error(match, keep_data, skip)
+            if whitelist:
+                Error.update_whitelisted((error,), whitelist)
+            yield error
+
+    @staticmethod
+    def update_whitelisted(errors: list,
+                           whitelist: Union[Whitelist, list]) -> List['Error']:
         """
         Scan the text error in `errors` and set `is_whitelisted = True` if
-        text matches a word in `whitelist` (**case insensitive**)
+        text matches an entry in `whitelist` (**case insensitive**), entries
+        scoped to a rule are applied to the errors of that rule only
         To use if `whitelist` has been updated
 
         :param errors:
-        :param whitelist:
+        :param whitelist: `Whitelist` or list of entries
         :return: list
         """
+        whitelist = Whitelist.coerce(whitelist)
         for error in errors:
-            if error.text_error.lower() not in whitelist:
+            if not whitelist.matches(error.text_error, error.rule_id):
                 continue
             error.is_whitelisted = True
         return errors
@@ -71,7 +140,7 @@ class Error(Entity):
         :param errors:
         :return: list of `Error`
         """
-        return [error for error in errors if error.rule.type == 'misspelling']
+        return [error for error in errors if error.issue_type == 'misspelling']
 
     @staticmethod
     def whitelist_filtered(errors: list) -> List['Error']:
@@ -80,95 +149,122 @@ class Error(Entity):
 
     @property
     def message(self) -> str:
-        return self._data['message']
+        return self._message
 
     @property
     def message_short(self) -> str:
-        return self._data['shortMessage']
+        return self._message_short
 
     @property
     def text_error(self) -> str:
-        if isinstance(self._context, Context):
-            return self._context.word
-        return ''
+        if self._text_error is None:
+            if isinstance(self._context, Context):
+                self._text_error = self._context.word
+            elif self._context:
+                # No need to build the `Context` just for the word
+                start = self._context['offset']
+                self._text_error = self._context['text'][
+                    start:start + self._context['length']]
+            else:
+                self._text_error = ''
+        return self._text_error
 
     @property
     def context(self) -> Union[None,  'Context']:
-        if isinstance(self._context, Context):
-            return self._context
-        return None
+        if isinstance(self._context, dict):
+            self._context = Context(self._context, self._keep_data)
+        return self._context
 
     @property
     def rule(self) -> Union[None, 'Rule']:
-        if isinstance(self._rule, Rule):
-            return self._rule
-        return None
+        if isinstance(self._rule, dict):
+            self._rule = Rule(self._rule, self._keep_data)
+        return self._rule
+
+    @property
+    def rule_id(self) -> str:
+        """Id of the rule, without building the `Rule`"""
+        return self._rule_id
+
+    @property
+    def issue_type(self) -> str:
+        """Same as `rule.type`, without building the `Rule`"""
+        return self._issue_type
 
     @property
     def suggestions(self) -> list:
-        if 'replacements' in self._data:
-            return [item['value'] for item in self._data['replacements']]
-        return list()
+        return list(self._suggestions)
 
     def absolute_position(self) -> Tuple[int, int, int]:
-        start = self._data['offset']
-        end = self._data['offset'] + self._data['length']
-        return start, end, self._data['length']
+        start = self._offset
+        end = self._offset + self._length
+        return start, end, self._length
 
 
 class Context(Entity):
     """Where an error occurs, proximity, error text coordinates ..."""
+    __slots__ = ('_text', '_offset', '_length')
 
-    def __init__(self, data: dict):
-        Entity.__init__(self,  data)
+    def __init__(self, data: dict, keep_data: bool = True):
+        Entity.__init__(self, data, keep_data)
+        self._text = data['text']
+        self._offset = data['offset']
+        self._length = data['length']
 
     @property
     def proximity(self) -> str:
         """The text surrounding the error"""
-        return self._data['text']
+        return self._text
 
     @property
     def word(self) -> str:
         """The error text"""
-        return self._data['text'][self.start:self.end]
+        return self._text[self.start:self.end]
 
     @property
     def start(self) -> str:
         """Start of the error text"""
-        return self._data['offset']
+        return self._offset
 
     @property
     def end(self) -> str:
         """End of the error text"""
-        return self.start + self._data['length']
+        return self._offset + self._length
 
 
 class Rule(Entity):
     """Rule for the language"""
-
-    def __init__(self, data: dict):
-        Entity.__init__(self,  data)
-        self._categ = Category(self._data['category'])
+    __slots__ = ('_id', '_sub_id', '_description', '_urls', '_type',
+                 '_categ')
+
+    def __init__(self, data: dict, keep_data: bool = True):
+        Entity.__init__(self, data, keep_data)
+        self._id = data['id']
+        self._sub_id = data.get('subId', data.get('subid', ''))
+        self._description = data['description']
+        self._urls = data.get('urls', '')
+        self._type = data.get('issueType', '')
+        self._categ = Category(data['category'], keep_data)
 
     @property
     def id(self):
-        return self._data['id']
+        return self._id
 
     @property
     def sub_id(self) -> str:
-        return self._data.get('subid', '')
+        return self._sub_id
 
     @property
     def description(self) -> str:
-        return self._data['description']
+        return self._description
 
     @property
     def urls(self) -> str:
-        return self._data.get('urls', '')
+        return self._urls
 
     @property
     def type(self) -> str:
-        return self._data.get('issueType', '')
+        return self._type
 
     @property
     def category(self) -> 'Category':
@@ -181,20 +277,23 @@ class Rule(Entity):
 
 class Category(Entity):
     """Unique rule category"""
+    __slots__ = ('_id', '_name')
 
-    def __init__(self, data: dict):
-        Entity.__init__(self,  data)
+    def __init__(self, data: dict, keep_data: bool = True):
+        Entity.__init__(self, data, keep_data)
+        self._id = data['id']
+        self._name = data['name']
 
     def __str__(self):
         return f'{self.id} - {self.name}'
 
     @property
     def id(self):
-        return self._data['id']
+        return self._id
 
     @property
     def name(self) -> str:
-        return self._data['name']
+        return self._name
 
 
 if __name__ == '__main__':
@@ -0,0 +1,36 @@
+# fastjson.py
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+__doc__ = """The fastest json decoder installed: `orjson`, `ujson` or the
+standard library `json`.
+
+`loads()` takes the response bytes as they are, with `orjson` no `str` copy
+of the body is made
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+# all of them accept bytes (utf-8) as well as str
+if orjson is not None:
+    DECODER, loads = 'orjson', orjson.loads
+elif ujson is not None:
+    DECODER, loads = 'ujson', ujson.loads
+else:
+    DECODER, loads = 'json', json.loads
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,131 @@
+# incremental.py
+
+import hashlib
+import re
+from typing import Union, Dict, Tuple, List
+
+import pylangtoolwrapper as pylt
+from entities import Error
+
+__doc__ = """Incremental check of a document that is being edited.
+Only the paragraphs changed since the previous check are sent, the errors of
+the unchanged ones are reused and moved to their new position
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+# A paragraph ends after a blank line (or at the end of the text)
+_PARAGRAPH = re.compile(r'.*?(?:\n[^\S\n]*\n\s*|\Z)', re.DOTALL)
+
+
+def split_paragraphs(text: str) -> List[Tuple[int, str]]:
+    """
+    Split `text` in paragraphs, each one keeps its trailing blank lines so
+    the paragraphs joined together give back `text`
+    :param text:
+    :return: list of (offset of the paragraph in `text`, paragraph)
+    """
+    return [(match.start(), match.group())
+            for match in _PARAGRAPH.finditer(text) if match.group()]
+
+
+def _digest(paragraph: str) -> str:
+    return hashlib.sha1(paragraph.encode('utf-8')).hexdigest()
+
+
+class IncrementalChecker:
+    """
+    Keep the check results of a document between edits.
+    Use one instance for each document
+    """
+
+    def __init__(self, lang_code: str,
+                 client: Union['pylt.LanguageToolClient', None] = None,
+                 max_chars_per_req: int = 20000,
+                 options: Union[dict, None] = None):
+        """
+        :param lang_code: language code
+        :param client: `LanguageToolClient`, the shared one if `None`
+        :param max_chars_per_req: chars allowed for request
+        :param options: other parameters for the API, see `check()`
+        """
+        self.lang_code = lang_code
+        self.max_chars_per_req = max_chars_per_req
+        self.options = options
+        self._client = client
+        # paragraph digest -> matches with offsets relative to the paragraph
+        self._results: Dict[str, List[dict]] = dict()
+        self.sent_chars = 0
+
+    def reset(self):
+        """Forget the previous results, next check sends the whole text"""
+        self._results.clear()
+
+    def _fetch(self, text: str) -> List[dict]:
+        """Check `text`, splitting it if too long for a single request"""
+        client = self._client or pylt.get_client()
+        matches = list()
+        for offset, piece in pylt.split_text(text, self.max_chars_per_req):
+            matches.extend(pylt._rebase(
+                client.fetch_matches(piece, self.lang_code, self.options),
+                offset
+            ))
+        self.sent_chars += len(text)
+        return matches
+
+    def _check_run(self, paragraphs: List[Tuple[int, str]]
+                   ) -> Dict[str, List[dict]]:
+        """
+        Check consecutive changed paragraphs in a single request (unless too
+        long), then assign each match to the paragraph where it starts
+        :param paragraphs: (offset, paragraph) adjacent in the text
+        :return: paragraph digest -> matches relative to the paragraph
+        """
+        start = paragraphs[0][0]
+        matches = self._fetch(''.join(par for _, par in paragraphs))
+        results = [list() for _ in paragraphs]
+        pos = 0
+        for match in sorted(matches, key=lambda item: item['offset']):
+            while (pos + 1 < len(paragraphs) and
+                   match['offset'] >= paragraphs[pos + 1][0] - start):
+                pos += 1
+            match['offset'] -= paragraphs[pos][0] - start
+            results[pos].append(match)
+        return {_digest(par): result
+                for (_, par), result in zip(paragraphs, results)}
+
+    def check(self, text: str, whitelist=None) -> List[Error]:
+        """
+        Check `text`, the new version of the document
+        :param text: the whole document
+        :param whitelist: words to ignore, see `pylangtoolwrapper.check()`
+        :return: list of `Error` objects for the whole `text`
+        """
+        paragraphs = split_paragraphs(text)
+        results = dict()
+        queued = set()
+        run = list()
+        for offset, par in paragraphs + [(len(text), None)]:
+            digest = _digest(par) if par is not None else None
+            if digest in self._results:
+                results[digest] = self._results[digest]
+            elif par is not None and digest not in queued:
+                queued.add(digest)
+                run.append((offset, par))
+                continue
+            if run:
+                results.update(self._check_run(run))
+                run = list()
+        self._results = results
+
+        matches = list()
+        for offset, par in paragraphs:
+            matches.extend(dict(match, offset=match['offset'] + offset)
+                           for match in results[_digest(par)])
+        return Error.parse({'matches': matches}, whitelist or list())
+
+
+if __name__ == '__main__':
+    pass
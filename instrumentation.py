@@ -0,0 +1,240 @@
+# instrumentation.py
+
+import threading
+import time
+from typing import Union, Dict
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+__doc__ = """Metrics and tracing hooks of `LanguageToolClient` and
+`aio.AsyncLanguageToolClient`.
+
+Pass a `Hooks` subclass as `LanguageToolClient(hooks=...)` to know where the
+time goes: network, json decoding or building the `Error` objects. Without
+hooks the client only checks `hooks is None` on each call.
+`PrometheusHooks` needs `prometheus_client`, `OpenTelemetryHooks` needs
+`opentelemetry-api`
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class Hooks:
+    """
+    Called by the client after each step, every method does nothing:
+    override the ones needed. Keep them fast, they run on the request path
+    and from many threads at the same time
+    """
+
+    def on_request(self, url: str, verb: str, status: Union[int, None],
+                   seconds: float, bytes_sent: int, bytes_received: int):
+        """
+        An HTTP request, once for each attempt
+        :param status: `None` if the connection failed or timed out
+        """
+
+    def on_cache(self, hit: bool):
+        """A check result looked up in the client cache"""
+
+    def on_decode(self, size: int, seconds: float):
+        """
+        The json of a check response decoded
+        :param size: bytes of the response
+        """
+
+    def on_matches(self, lang_code: str, chars: int, matches: int):
+        """
+        The result of a single check request (or cache lookup)
+        :param chars: chars checked
+        :param matches: matches returned
+        """
+
+    def on_parse(self, errors: int, seconds: float,
+                 whitelist_seconds: float):
+        """
+        `Error` objects built from the matches of a `check()`, or of each
+        request of `check_stream()` and `check_file()`
+        :param errors: how many
+        :param seconds: spent by `Error.parse`
+        :param whitelist_seconds: spent by `Error.update_whitelisted`
+        """
+
+
+class MultiHooks(Hooks):
+    """Forward the calls to many hooks, i.e. metrics and tracing"""
+
+    def __init__(self, *hooks: Hooks):
+        self.hooks = hooks
+
+    def on_request(self, *args):
+        for hooks in self.hooks:
+            hooks.on_request(*args)
+
+    def on_cache(self, hit: bool):
+        for hooks in self.hooks:
+            hooks.on_cache(hit)
+
+    def on_decode(self, size: int, seconds: float):
+        for hooks in self.hooks:
+            hooks.on_decode(size, seconds)
+
+    def on_matches(self, lang_code: str, chars: int, matches: int):
+        for hooks in self.hooks:
+            hooks.on_matches(lang_code, chars, matches)
+
+    def on_parse(self, errors: int, seconds: float,
+                 whitelist_seconds: float):
+        for hooks in self.hooks:
+            hooks.on_parse(errors, seconds, whitelist_seconds)
+
+
+class StatsHooks(Hooks):
+    """Totals in memory, without dependencies, see `snapshot()`"""
+
+    _FIELDS = ('requests', 'failed', 'request_seconds', 'bytes_sent',
+               'bytes_received', 'cache_hits', 'cache_misses',
+               'decode_seconds', 'chars', 'matches', 'errors',
+               'parse_seconds', 'whitelist_seconds')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = dict.fromkeys(self._FIELDS, 0)
+
+    def _add(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                self._totals[name] += value
+
+    def on_request(self, url, verb, status, seconds, bytes_sent,
+                   bytes_received):
+        self._add(requests=1, failed=int(status != 200),
+                  request_seconds=seconds, bytes_sent=bytes_sent,
+                  bytes_received=bytes_received)
+
+    def on_cache(self, hit):
+        self._add(cache_hits=int(hit), cache_misses=int(not hit))
+
+    def on_decode(self, size, seconds):
+        self._add(decode_seconds=seconds)
+
+    def on_matches(self, lang_code, chars, matches):
+        self._add(chars=chars, matches=matches)
+
+    def on_parse(self, errors, seconds, whitelist_seconds):
+        self._add(errors=errors, parse_seconds=seconds,
+                  whitelist_seconds=whitelist_seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        """:return: a copy of the totals"""
+        with self._lock:
+            return dict(self._totals)
+
+
+class PrometheusHooks(Hooks):
+    """Counters and histograms in a `prometheus_client` registry"""
+
+    def __init__(self, registry=None, namespace: str = 'pylangtoolwrapper'):
+        """
+        :param registry: defaults to the global `prometheus_client.REGISTRY`
+        :param namespace: prefix of the metric names
+        """
+        if prometheus_client is None:
+            raise ImportError(
+                'prometheus_client is required for PrometheusHooks')
+        metric = dict(namespace=namespace,
+                      registry=registry or prometheus_client.REGISTRY)
+        counter, histogram = (prometheus_client.Counter,
+                              prometheus_client.Histogram)
+        self.request_seconds = histogram(
+            'request_seconds', 'HTTP request latency', ['verb', 'status'],
+            **metric)
+        self.bytes_sent = counter('sent_bytes', 'Request bytes', **metric)
+        self.bytes_received = counter('received_bytes', 'Response bytes',
+                                      **metric)
+        self.cache = counter('cache_lookups', 'Check cache lookups',
+                             ['result'], **metric)
+        self.decode_seconds = histogram('decode_seconds',
+                                        'Response json decoding', **metric)
+        self.chars = counter('chars_checked', 'Chars checked', ['lang'],
+                             **metric)
+        self.matches = counter('matches', 'Matches returned', ['lang'],
+                               **metric)
+        self.parse_seconds = histogram('parse_seconds', 'Error.parse',
+                                       **metric)
+        self.whitelist_seconds = histogram(
+            'whitelist_seconds', 'Error.update_whitelisted', **metric)
+
+    def on_request(self, url, verb, status, seconds, bytes_sent,
+                   bytes_received):
+        self.request_seconds.labels(verb, str(status)).observe(seconds)
+        self.bytes_sent.inc(bytes_sent)
+        self.bytes_received.inc(bytes_received)
+
+    def on_cache(self, hit):
+        self.cache.labels('hit' if hit else 'miss').inc()
+
+    def on_decode(self, size, seconds):
+        self.decode_seconds.observe(seconds)
+
+    def on_matches(self, lang_code, chars, matches):
+        self.chars.labels(lang_code).inc(chars)
+        self.matches.labels(lang_code).inc(matches)
+
+    def on_parse(self, errors, seconds, whitelist_seconds):
+        self.parse_seconds.observe(seconds)
+        self.whitelist_seconds.observe(whitelist_seconds)
+
+
+class OpenTelemetryHooks(Hooks):
+    """
+    A span for each request, decoding and parsing, children of the span
+    current in the calling thread. The hooks run after each step, so the
+    spans are created with their past start time
+    """
+
+    def __init__(self, tracer=None):
+        """
+        :param tracer: defaults to the tracer of this module from the global
+                       tracer provider
+        """
+        if otel_trace is None:
+            raise ImportError(
+                'opentelemetry-api is required for OpenTelemetryHooks')
+        self.tracer = tracer or otel_trace.get_tracer('pylangtoolwrapper')
+
+    def _span(self, name: str, seconds: float, attributes: dict):
+        end = time.time_ns()
+        span = self.tracer.start_span(
+            name, start_time=end - int(seconds * 1e9), attributes=attributes)
+        span.end(end_time=end)
+
+    def on_request(self, url, verb, status, seconds, bytes_sent,
+                   bytes_received):
+        attributes = {'http.method': verb, 'http.url': url,
+                      'http.request_content_length': bytes_sent,
+                      'http.response_content_length': bytes_received}
+        if status is not None:
+            attributes['http.status_code'] = status
+        self._span('languagetool.request', seconds, attributes)
+
+    def on_decode(self, size, seconds):
+        self._span('languagetool.decode', seconds, {'size': size})
+
+    def on_parse(self, errors, seconds, whitelist_seconds):
+        self._span('languagetool.parse', seconds + whitelist_seconds,
+                   {'errors': errors,
+                    'whitelist_seconds': whitelist_seconds})
+
+
+if __name__ == '__main__':
+    pass
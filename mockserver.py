@@ -0,0 +1,278 @@
+# mockserver.py
+
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import threading
+import time
+from typing import Union, List, Tuple
+from urllib.parse import parse_qs
+
+__doc__ = """Local stand-in for the LanguageTool API, for tests and benchmarks
+without network.
+
+Serves `/v2/languages` and `/v2/check`: a check response has a match every
+`match_every` chars of text, with the fields the real API sends. Latency and
+failures can be injected.
+
+    python mockserver.py --port 8081 --latency 0.05 --error-rate 0.1
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+LANGUAGES = [
+    {'name': 'English (US)', 'code': 'en', 'longCode': 'en-US'},
+    {'name': 'English (GB)', 'code': 'en', 'longCode': 'en-GB'},
+    {'name': 'German (Germany)', 'code': 'de', 'longCode': 'de-DE'},
+    {'name': 'French', 'code': 'fr', 'longCode': 'fr'},
+    {'name': 'Italian', 'code': 'it', 'longCode': 'it'},
+    {'name': 'Spanish', 'code': 'es', 'longCode': 'es'},
+]
+
+# (rule id, description, issue type, category id, category name)
+_RULES = [
+    ('MORFOLOGIK_RULE_IT_IT', 'Possibile errore di ortografia',
+     'misspelling', 'TYPOS', 'Possibile errore di battitura'),
+    ('WHITESPACE_RULE', 'Spazi ripetuti', 'whitespace', 'TYPOGRAPHY',
+     'Tipografia'),
+    ('UPPERCASE_SENTENCE_START', 'Maiuscola a inizio frase',
+     'typographical', 'CASING', 'Maiuscole e minuscole'),
+    ('IT_AGREEMENT', 'Concordanza', 'grammar', 'GRAMMAR', 'Grammatica'),
+]
+
+_WORD = re.compile(r'\w+')
+
+# Chars of context on each side of the error, as the real API
+_CONTEXT = 40
+
+
+def make_matches(text: str, match_every: int = 80) -> List[dict]:
+    """
+    Build the matches of a check response, one word every `match_every`
+    chars is an error
+    :param text: the checked text
+    :param match_every: chars between two errors
+    :return: list of matches
+    """
+    matches = list()
+    next_at = 0
+    for word in _WORD.finditer(text):
+        if word.start() < next_at:
+            continue
+        next_at = word.start() + match_every
+        offset, length = word.start(), word.end() - word.start()
+        start = max(0, offset - _CONTEXT)
+        rule_id, description, issue_type, cat_id, cat_name = _RULES[
+            len(matches) % len(_RULES)]
+        matches.append({
+            'message': f'{description}: {word.group()}',
+            'shortMessage': description,
+            'replacements': [{'value': word.group().lower()},
+                             {'value': word.group().capitalize()}],
+            'offset': offset,
+            'length': length,
+            'context': {'text': text[start:word.end() + _CONTEXT],
+                        'offset': offset - start, 'length': length},
+            'sentence': text[start:word.end()],
+            'type': {'typeName': 'Other'},
+            'rule': {
+                'id': rule_id, 'description': description,
+                'issueType': issue_type,
+                'urls': [{'value': 'https://languagetool.org/'}],
+                'category': {'id': cat_id, 'name': cat_name}
+            },
+            'ignoreForIncompleteSentence': False,
+            'contextForSureMatch': 0
+        })
+    return matches
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.mock.lock:
+            self.server.mock.connections += 1
+
+    def _reply(self, status: int, data, headers: Tuple = ()):
+        """Send the whole response with a single write"""
+        body = json.dumps(data).encode('utf-8')
+        head = [f'HTTP/1.1 {status} {self.responses.get(status, ("",))[0]}',
+                'Content-Type: application/json',
+                f'Content-Length: {len(body)}']
+        if self.close_connection:
+            # else the client may reuse the connection closed after this
+            head.append('Connection: close')
+        head.extend(f'{name}: {value}' for name, value in headers)
+        self.wfile.write('\r\n'.join(head).encode('ascii') + b'\r\n\r\n' +
+                         body)
+        with self.server.mock.lock:
+            self.server.mock.in_flight -= 1
+
+    def _route(self, text: str = '') -> Union[str, None]:
+        """
+        Count the request, wait the latency and maybe fail
+        :return: the route, `None` if the response has been sent
+        """
+        server: 'MockLanguageTool' = self.server.mock
+        route = self.path.split('?')[0]
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight,
+                                        server.in_flight)
+            failure = server.error_rate and server.random() < server.error_rate
+            status = server.choice(server.error_statuses) if failure else 200
+        delay = server.latency + server.latency_per_char * len(text)
+        if delay:
+            time.sleep(delay)
+        if failure:
+            headers = ()
+            if server.retry_after is not None:
+                headers = (('Retry-After', server.retry_after), )
+            self._reply(status, {'message': 'injected failure'}, headers)
+            return None
+        if not route.startswith(server.prefix):
+            self._reply(404, {'message': 'not found'})
+            return None
+        return route[len(server.prefix):]
+
+    def do_GET(self):
+        route = self._route()
+        if route is None:
+            return
+        if route == 'languages':
+            self._reply(200, LANGUAGES)
+        else:
+            self._reply(404, {'message': 'not found'})
+
+    def do_POST(self):
+        size = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(size).decode('utf-8'))
+        text = form.get('text', [''])[0]
+        route = self._route(text)
+        if route is None:
+            return
+        if route != 'check':
+            self._reply(404, {'message': 'not found'})
+            return
+        self._reply(200, {
+            'software': {'name': 'LanguageTool', 'version': 'mock',
+                         'apiVersion': 1},
+            'language': {'name': form.get('language', [''])[0],
+                         'code': form.get('language', [''])[0]},
+            'matches': make_matches(text, self.server.mock.match_every)
+        })
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # a client going away mid response is not worth a traceback
+
+
+class MockLanguageTool:
+    """
+    The server runs on a daemon thread, use it as a context manager or call
+    `start()` and `stop()`
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, latency_per_char: float = 0.0,
+                 error_rate: float = 0.0,
+                 error_statuses: Tuple[int, ...] = (503, ),
+                 retry_after: Union[str, None] = None,
+                 match_every: int = 80, seed: Union[int, None] = None):
+        """
+        :param host:
+        :param port: 0 picks a free port
+        :param latency: seconds before each response
+        :param latency_per_char: seconds added for each char checked
+        :param error_rate: fraction of requests failing (0 - 1)
+        :param error_statuses: the status of a failure is one of these
+        :param retry_after: Retry-After header of the failures
+        :param match_every: chars between two errors in the check responses
+        :param seed: for the failures, to repeat a run
+        """
+        self.latency = latency
+        self.latency_per_char = latency_per_char
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.retry_after = retry_after
+        self.match_every = match_every
+        self.prefix = '/v2/'
+        # requests, connections accepted, most requests served at once
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = self.peak_in_flight = 0
+        self.lock = threading.Lock()
+        rnd = random.Random(seed)
+        self.random, self.choice = rnd.random, rnd.choice
+        self._server = _Server((host, port), _Handler)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """API root, as `LanguageToolClient(base_url=...)` wants it"""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}{self.prefix}'
+
+    def start(self) -> 'MockLanguageTool':
+        # short poll, so that stop() does not wait
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        args=(0.05, ), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'MockLanguageTool':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def main(argv: Union[List[str], None] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds before each response')
+    parser.add_argument('--latency-per-char', type=float, default=0.0,
+                        help='seconds added for each char checked')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests failing with 503')
+    parser.add_argument('--match-every', type=int, default=80,
+                        help='chars between two errors (%(default)s)')
+    args = parser.parse_args(argv)
+    server = MockLanguageTool(args.host, args.port, args.latency,
+                              args.latency_per_char, args.error_rate,
+                              match_every=args.match_every)
+    print(f'serving {server.base_url}')
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,7 @@ from typing import Tuple, List
 
 import pylangtoolwrapper as pylt
 import entities
+from incremental import IncrementalChecker
 from pylanggui.__init__ import ini, get_whitelist, gui_folder, save_whitelist
 from tk_tooltips import show_tooltip
 from tk_whitelists import WhiteListManager
@@ -91,6 +92,7 @@ class Gui:
         self._last_opened_file = None
         self.errors = list()
         self._errors_original = list()
+        self._checkers = dict()
         self._navpos = 0
         self._goto = 0
         self._language = tk.StringVar()
@@ -555,10 +557,14 @@ class Gui:
         :param lang: language code
         :param whitelist: list of whitelisted words
         """
+        # Only the paragraphs edited since the last parse are sent
+        if lang not in self._checkers:
+            self._checkers[lang] = IncrementalChecker(
+                lang, max_chars_per_req=MAX_CHARS_FOR_REQUEST
+            )
         try:
-            self.errors = pylt.check(
-                self._text.get(1.0, tk.END), lang, whitelist,
-                MAX_CHARS_FOR_REQUEST
+            self.errors = self._checkers[lang].check(
+                self._text.get(1.0, tk.END), whitelist
             )
             self._errors_original = self.errors[:]
         except pylt.PyLangToolWrapperException as pyltex:
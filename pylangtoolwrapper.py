@@ -1,10 +1,28 @@
 # pylangtoolwrapper.py
 
+from bisect import bisect_right
+import codecs
 from collections import namedtuple
-from entities import Error
-from typing import Union, Dict, Tuple, List
+from concurrent.futures import ThreadPoolExecutor
+import json
+import mmap
+import os
+import random
+import re
+import threading
+import time
+from cache import CheckCache, make_key
+from endpoints import EndpointPool, ROUND_ROBIN
+from entities import Error, SKIPPABLE_FIELDS
+import fastjson
+from instrumentation import Hooks
+from ratelimit import (AdaptiveConcurrency, RateLimiter, THROTTLE_STATUSES,
+                       parse_retry_after)
+from typing import Union, Dict, Iterator, Tuple, List, IO
+from whitelist import Whitelist
 
 import requests
+from requests.adapters import HTTPAdapter
 
 __doc__ = """API Wrapper for the LanguageTool API REST (free plan)
 https://languagetool.org/http-api/languagetool-swagger.json
@@ -24,89 +42,955 @@ ROUTES = {
 
 Language = namedtuple('Language', 'name code long_code')
 
+# An error found by `check_file()` and where it is in the file, in bytes
+FileError = namedtuple('FileError', 'byte_start byte_end error')
+
+# The languages list rarely changes, it's kept on disk for `LANGUAGES_TTL`
+LANGUAGES_FILE = os.path.join(os.path.expanduser('~'), '.cache',
+                              'pylangtoolwrapper', 'languages.json')
+LANGUAGES_TTL = 7 * 24 * 60 * 60
+
 
 class PyLangToolWrapperException(Exception):
     pass
 
 
+class PyLangToolWrapperRetryableException(PyLangToolWrapperException):
+    """A failure that may not happen again: 5xx, connection reset, timeout"""
+
+    def __init__(self, message: str, status: Union[int, None] = None,
+                 retry_after: Union[float, None] = None):
+        PyLangToolWrapperException.__init__(self, message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class PyLangToolWrapperFatalException(PyLangToolWrapperException):
+    """A failure that will happen again, i.e. a bad request"""
+
+
+class PyLangToolWrapperRateLimited(PyLangToolWrapperRetryableException):
+    """The server answered 429 or 503"""
+
+
+# Statuses worth another try, besides `THROTTLE_STATUSES`
+RETRY_STATUSES = (500, 502, 504)
+
+
+class RetryPolicy:
+    """
+    How to retry the requests failed with a
+    `PyLangToolWrapperRetryableException`: up to `retries` more times,
+    waiting a random time up to an exponentially growing backoff (full
+    jitter), giving up when the next wait would go over `budget` seconds
+    from the first try
+    """
+
+    def __init__(self, retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 30, budget: float = 60):
+        """
+        :param retries: max retries after the first try
+        :param backoff: seconds, max wait before the first retry, doubled
+                        at every retry
+        :param max_backoff: seconds, the max wait is never longer
+        :param budget: seconds, max total time for a request and its retries
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+
+    def delay(self, attempt: int,
+              retry_after: Union[float, None] = None) -> float:
+        """
+        :param attempt: retries done so far
+        :param retry_after: seconds asked by the server, if any
+        :return: seconds to wait before the next try
+        """
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return max(delay, retry_after or 0)
+
+
+def _check_chars_for_req(text: str, max_chars: int) -> tuple:
+    """
+    Check `text` lenght against `max_chars`, blank spaces included because it's
+    :param text:
+    :param max_chars:
+    :return: True if chars in `text` > `max_chars` and the total chars in `text`
+    """
+    return len(text) > max_chars, len(text)
+
+
+# Where a request-sized chunk may end, from the most to the least preferable
+_PARAGRAPH_END = re.compile(r'\n\s*\n')
+_LINE_END = re.compile(r'\n')
+_SENTENCE_END = re.compile(r'[.!?\u2026][\'"\u201d\u00bb)\]]*\s+')
+_WORD_END = re.compile(r'\s+')
+
+
+def _find_cut(window: str) -> int:
+    """
+    Find where to cut `window` so that the first part ends on a paragraph,
+    line, sentence or word boundary (in this order of preference).
+    A boundary in the first half of the window is taken only if none is in
+    the second half, so a title at the start does not become a tiny chunk
+    :param window: text not longer than the allowed chars for request
+    :return: length of the first part, `len(window)` if no boundary is found
+    """
+    for minimum in (len(window) // 2, 1):
+        for boundary in (_PARAGRAPH_END, _LINE_END, _SENTENCE_END,
+                         _WORD_END):
+            cut = 0
+            for match in boundary.finditer(window):
+                cut = match.end()
+            if cut >= minimum:
+                return cut
+    return len(window)
+
+
+def split_text(text: str, max_chars: int) -> List[Tuple[int, str]]:
+    """
+    Split `text` in chunks of at most `max_chars` characters, cutting on
+    paragraph/sentence boundaries when possible.
+    The chunks joined together give back `text`
+    :param text:
+    :param max_chars: chars allowed for request
+    :return: list of (offset of the chunk in `text`, chunk)
+    """
+    if max_chars <= 0:
+        raise PyLangToolWrapperException('max_chars must be greater than 0')
+    chunks = list()
+    pos = 0
+    while len(text) - pos > max_chars:
+        cut = _find_cut(text[pos:pos + max_chars])
+        chunks.append((pos, text[pos:pos + cut]))
+        pos += cut
+    if pos < len(text) or not chunks:
+        chunks.append((pos, text[pos:]))
+    return chunks
+
+
+def _rebase(matches: List[dict], offset: int) -> List[dict]:
+    """
+    Shift the `offset` of the raw `matches` of a chunk so that they refer to
+    the whole text the chunk has been cut from
+    :param matches: `matches` from a check response
+    :param offset: position of the chunk in the whole text
+    :return: `matches`, updated in place
+    """
+    if offset:
+        for match in matches:
+            match['offset'] += offset
+    return matches
+
+
+# Where a window of a memory mapped file may end, see `_find_cut()`
+_BYTES_BOUNDARIES = ((b'\n\n',), (b'\n',), (b'. ', b'! ', b'? '), (b' ',))
+
+
+def _find_byte_cut(buffer: mmap.mmap, start: int, end: int) -> int:
+    """
+    Like `_find_cut()` on the bytes of an utf-8 text, without copying them
+    :param buffer: the mapped file
+    :param start: window start
+    :param end: window end, excluded
+    :return: where the window ends, never inside a multi-byte character
+    """
+    for minimum in (start + (end - start) // 2, start + 1):
+        for separators in _BYTES_BOUNDARIES:
+            cut = -1
+            for separator in separators:
+                found = buffer.rfind(separator, start, end)
+                if found >= 0:
+                    cut = max(cut, found + len(separator))
+            if cut >= minimum:
+                return cut
+    # utf-8 continuation bytes are 0b10xxxxxx
+    while end > start + 1 and buffer[end] & 0xC0 == 0x80:
+        end -= 1
+    return end
+
+
+def _byte_offsets(text: str, matches: List[dict]) -> List[Tuple[int, int]]:
+    """
+    Convert the char offsets of `matches` to byte offsets in `text` utf-8
+    encoded, encoding every char once
+    :param text:
+    :param matches: sorted by `offset`
+    :return: (byte start, byte end) for each match
+    """
+    positions = list()
+    char_pos = byte_pos = 0
+    for match in matches:
+        start, end = match['offset'], match['offset'] + match['length']
+        byte_pos += len(text[char_pos:start].encode('utf-8'))
+        char_pos = start
+        byte_end = byte_pos + len(text[start:end].encode('utf-8'))
+        positions.append((byte_pos, byte_end))
+    return positions
+
+
+# Between the texts packed in a single request by `check_many()`
+PACK_SEPARATOR = '\n\n'
+
+
+def _pack(texts: List[str], max_chars: int) -> List[List[int]]:
+    """
+    Group the positions of `texts` so that each group, joined with
+    `PACK_SEPARATOR`, fits in `max_chars`. Longer texts stay alone
+    :param texts:
+    :param max_chars: chars allowed for request
+    :return: list of groups of positions in `texts`
+    """
+    packs = list()
+    current = list()
+    size = 0
+    for pos, text in enumerate(texts):
+        needed = len(text) + (len(PACK_SEPARATOR) if current else 0)
+        if current and size + needed > max_chars:
+            packs.append(current)
+            current, size, needed = list(), 0, len(text)
+        current.append(pos)
+        size += needed
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _unpack(matches: List[dict], starts: List[int],
+            lengths: List[int]) -> List[List[dict]]:
+    """
+    Give each match of a packed request back to its text, moving the offset
+    relative to the text. Matches crossing a separator are dropped
+    :param matches: of the packed request
+    :param starts: offset of each text in the packed request
+    :param lengths: length of each text
+    :return: matches for each text
+    """
+    results = [list() for _ in starts]
+    for match in matches:
+        pos = bisect_right(starts, match['offset']) - 1
+        if pos < 0:
+            continue
+        offset = match['offset'] - starts[pos]
+        if offset + match['length'] > lengths[pos]:
+            continue
+        match['offset'] = offset
+        results[pos].append(match)
+    return results
+
+
+def _parse_languages(records: List[dict]) -> List[Language]:
+    """
+    Build the `Language` list from the `languages` route response
+    :param records: decoded json response
+    :return: list
+    """
+    return [Language(record['name'], record['code'], record['longCode'])
+            for record in records]
+
+
+class LanguageToolClient:
+    """
+    Reusable connection to the LanguageTool API.
+
+    Requests go through a pooled `requests.Session`, so consecutive calls
+    reuse the same TCP/TLS connection instead of opening a new one each time.
+    The client can be shared between threads.
+    """
+
+    def __init__(self, base_url: Union[str, List[str], None] = None,
+                 pool_size: int = 10, keep_alive: bool = True,
+                 timeout: Union[float, Tuple[float, float], None] = (5, 60),
+                 ua: Union[str, None] = None,
+                 max_in_flight: Union[int, None] = None,
+                 cache: Union[CheckCache, None] = None,
+                 languages_file: Union[str, None] = LANGUAGES_FILE,
+                 languages_ttl: float = LANGUAGES_TTL,
+                 rate_limiter: Union[RateLimiter, None] = None,
+                 concurrency: Union[AdaptiveConcurrency, None] = None,
+                 retry: Union[RetryPolicy, None] = None,
+                 strategy: str = ROUND_ROBIN,
+                 hooks: Union[Hooks, None] = None,
+                 keep_data: bool = True, skip_fields=()):
+        """
+        :param base_url: API root, defaults to `ROUTES['base']`, or a list
+                         of them (i.e. self-hosted servers) to spread the
+                         requests on
+        :param pool_size: max connections kept open per host
+        :param keep_alive: if `False` every connection is closed after the
+                           response, like the old per-call behaviour
+        :param timeout: seconds, either a single value or a
+                        (connect, read) tuple, `None` waits forever
+        :param ua: user agent string
+        :param max_in_flight: max requests running at the same time, across
+                              all the threads using the client, `None` for
+                              no limit
+        :param cache: where to keep the check results to avoid asking twice
+                      for the same text, i.e. `cache.MemoryCache()`
+        :param languages_file: where to keep the languages list between
+                               runs, `None` to keep it in memory only
+        :param languages_ttl: seconds before the languages list is fetched
+                              again
+        :param rate_limiter: requests and chars per minute limits, i.e.
+                             `ratelimit.RateLimiter()` for the free plan
+        :param concurrency: `ratelimit.AdaptiveConcurrency`, backs off when
+                            the server answers 429/503
+        :param retry: `RetryPolicy` for the transient failures, `None` to
+                      raise them at once
+        :param strategy: with many `base_url`, how to choose the server,
+                         `endpoints.ROUND_ROBIN` or
+                         `endpoints.LEAST_OUTSTANDING`
+        :param hooks: `instrumentation.Hooks` told about requests, decoding
+                      and parsing, `None` for no instrumentation
+        :param keep_data: if `False` the `Error` objects do not keep the raw
+                          json, see `Error.parse()`
+        :param skip_fields: fields left out of the `Error` objects, among
+                            `entities.SKIPPABLE_FIELDS`, see `Error.parse()`
+        """
+        unknown = set(skip_fields) - SKIPPABLE_FIELDS
+        if unknown:
+            raise PyLangToolWrapperException(
+                f"Can't skip {', '.join(sorted(unknown))}")
+        self.endpoints = None
+        if isinstance(base_url, (list, tuple)):
+            # The first one stands for all of them in cache keys and urls
+            self.endpoints = EndpointPool(list(base_url), strategy)
+            base_url = base_url[0]
+        self.base_url = base_url or ROUTES['base']
+        self.cache = cache
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._session.headers['user-agent'] = ua or USER_AGENT
+        if not keep_alive:
+            self._session.headers['connection'] = 'close'
+        self._in_flight = (threading.BoundedSemaphore(max_in_flight)
+                           if max_in_flight else None)
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.retry = retry
+        self.hooks = hooks
+        self.keep_data = keep_data
+        self.skip_fields = frozenset(skip_fields)
+        self._health_stop = None
+        self.languages_file = languages_file
+        self.languages_ttl = languages_ttl
+        self._languages: Union[List[Language], None] = None
+        self._languages_index: Dict[str, Language] = dict()
+        self._languages_fetched = 0.0
+        self._languages_lock = threading.Lock()
+
+    def __enter__(self) -> 'LanguageToolClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the pooled connections"""
+        if self._health_stop is not None:
+            self._health_stop.set()
+        self._session.close()
+
+    def check_health(self, timeout: float = 5):
+        """
+        With many `base_url`, probe the `languages` route of each server,
+        ejecting the failing ones and bringing back the healthy ones
+        :param timeout: seconds for each probe
+        """
+        if self.endpoints is None:
+            return
+
+        def probe(url: str) -> bool:
+            r = self._session.get(f"{url}{ROUTES['languages']}",
+                                  timeout=timeout)
+            return r.status_code == 200
+
+        self.endpoints.health_check(probe)
+
+    def start_health_checks(self, interval: float = 30) -> threading.Thread:
+        """
+        Run `check_health()` every `interval` seconds in a daemon thread,
+        until `close()`
+        :return: the thread
+        """
+        self._health_stop = threading.Event()
+        stop = self._health_stop
+
+        def run():
+            while not stop.wait(interval):
+                self.check_health()
+
+        thread = threading.Thread(target=run, daemon=True,
+                                  name='pylangtoolwrapper-health')
+        thread.start()
+        return thread
+
+    def url(self, route: str) -> str:
+        """Full endpoint for `route`, one of the `ROUTES` keys"""
+        return f"{self.base_url}{ROUTES[route]}"
+
+    def request(self, url: str, verb: str = 'GET',
+                payload: Union[dict, None] = None,
+                ua: Union[str, None] = None,
+                idempotent: Union[bool, None] = None) -> requests.Response:
+        """
+        Manage request
+        :param url: the API REST endpoint
+        :param verb:
+        :param payload: paramenters for request
+        :param ua: user agent string, overrides the session one
+        :param idempotent: if the request can be safely sent again, so
+                           retried following the client `retry` policy,
+                           defaults to `True` for GET only
+        :return: response
+        """
+        if verb not in ('GET', 'POST'):
+            raise PyLangToolWrapperFatalException(
+                'not a valid verb for this API')
+        if idempotent is None:
+            idempotent = verb == 'GET'
+        if self.retry is None or not idempotent:
+            return self._send(url, verb, payload, ua)
+
+        deadline = time.monotonic() + self.retry.budget
+        attempt = 0
+        while True:
+            try:
+                return self._send(url, verb, payload, ua)
+            except PyLangToolWrapperRetryableException as exc:
+                delay = self.retry.delay(attempt, exc.retry_after)
+                if (attempt >= self.retry.retries or
+                        time.monotonic() + delay > deadline):
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(self, url: str, verb: str, payload: Union[dict, None],
+              ua: Union[str, None]) -> requests.Response:
+        """
+        Send a request once, see `request()`. With many servers `url` is
+        moved to the one chosen by `endpoints`
+        """
+        if self.endpoints is None or not url.startswith(self.base_url):
+            return self._transmit(url, verb, payload, ua)
+        endpoint = self.endpoints.acquire()
+        ok = False
+        try:
+            r = self._transmit(
+                f'{endpoint.url}{url[len(self.base_url):]}', verb, payload, ua
+            )
+            ok = True
+            return r
+        except PyLangToolWrapperFatalException:
+            ok = True  # the server is up, the request is wrong
+            raise
+        finally:
+            self.endpoints.release(endpoint, ok)
+
+    def _transmit(self, url: str, verb: str, payload: Union[dict, None],
+                  ua: Union[str, None]) -> requests.Response:
+        headers = {'user-agent': ua} if ua else None
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(len((payload or {}).get('text', '')))
+        if self.concurrency is not None:
+            self.concurrency.acquire()
+        if self._in_flight is not None:
+            self._in_flight.acquire()
+        hooks = self.hooks
+        status = None
+        try:
+            if hooks is not None:
+                start = time.perf_counter()
+            if verb == 'GET':
+                r = self._session.get(url, headers=headers,
+                                      timeout=self.timeout)
+            else:
+                r = self._session.post(url, headers=headers, data=payload,
+                                       timeout=self.timeout)
+            status = r.status_code
+        except requests.RequestException as exc:
+            if hooks is not None:
+                hooks.on_request(url, verb, None,
+                                 time.perf_counter() - start, 0, 0)
+            # a connection reset while reading the body is chunked encoding
+            if isinstance(exc, (requests.ConnectionError, requests.Timeout,
+                                requests.exceptions.ChunkedEncodingError)):
+                raise PyLangToolWrapperRetryableException(
+                    f"{exc.__class__.__name__}: {exc}") from exc
+            raise PyLangToolWrapperFatalException(
+                f"{exc.__class__.__name__}: {exc}") from exc
+        finally:
+            if self._in_flight is not None:
+                self._in_flight.release()
+            if self.concurrency is not None:
+                self.concurrency.release(status)
+        if hooks is not None:
+            hooks.on_request(url, verb, status, time.perf_counter() - start,
+                             len(r.request.body or ''), len(r.content))
+        if r.status_code in THROTTLE_STATUSES:
+            retry_after = parse_retry_after(r.headers.get('retry-after'))
+            if retry_after and self.rate_limiter is not None:
+                self.rate_limiter.pause(retry_after)
+            raise PyLangToolWrapperRateLimited(
+                f"Error {r.status_code}\n{r.text}", r.status_code,
+                retry_after)
+        if r.status_code in RETRY_STATUSES:
+            raise PyLangToolWrapperRetryableException(
+                f"Error {r.status_code}\n{r.text}", r.status_code)
+        if r.status_code != 200:
+            raise PyLangToolWrapperFatalException(
+                f"Error {r.status_code}\n{r.text}")
+        return r
+
+    def _load_languages(self) -> Union[Tuple[float, List[dict]], None]:
+        """
+        Read the languages stored for this `base_url` in `languages_file`
+        :return: (fetch time, records) or `None` if missing or expired
+        """
+        if not self.languages_file:
+            return None
+        try:
+            with open(self.languages_file, encoding='utf-8') as fh:
+                stored = json.load(fh)[self.base_url]
+            fetched, records = stored['fetched'], stored['languages']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if time.time() - fetched > self.languages_ttl:
+            return None
+        return fetched, records
+
+    def _save_languages(self, fetched: float, records: List[dict]):
+        """Store the languages for this `base_url` in `languages_file`"""
+        if not self.languages_file:
+            return
+        try:
+            with open(self.languages_file, encoding='utf-8') as fh:
+                stored = json.load(fh)
+            if not isinstance(stored, dict):
+                stored = dict()
+        except (OSError, ValueError):
+            stored = dict()
+        stored[self.base_url] = {'fetched': fetched, 'languages': records}
+        try:
+            os.makedirs(os.path.dirname(self.languages_file), exist_ok=True)
+            tmp = f'{self.languages_file}.{os.getpid()}.tmp'
+            with open(tmp, mode='w', encoding='utf-8') as fh:
+                json.dump(stored, fh)
+            os.replace(tmp, self.languages_file)
+        except OSError:
+            pass  # the list is still kept in memory
+
+    def get_languages(self, refresh: bool = False) -> List[Language]:
+        """
+        Get available languages. The list is fetched once and then kept in
+        memory and in `languages_file` for `languages_ttl` seconds
+        :param refresh: fetch the list from the API anyway
+        :return: list
+        """
+        with self._languages_lock:
+            expired = (time.time() - self._languages_fetched >
+                       self.languages_ttl)
+            if refresh or self._languages is None or expired:
+                stored = None if refresh else self._load_languages()
+                if stored is None:
+                    resp = self.request(self.url('languages'))
+                    stored = time.time(), resp.json()
+                    self._save_languages(*stored)
+                self._languages_fetched, records = stored
+                self._languages = _parse_languages(records)
+                index = {lang.long_code: lang for lang in self._languages}
+                for lang in self._languages:
+                    index.setdefault(lang.code, lang)
+                self._languages_index = index
+            return list(self._languages)
+
+    def get_language(self, code: str) -> Union[Language, None]:
+        """
+        Find a language by `code` or `long_code`, i.e. to validate the
+        `lang_code` before `check()`
+        :param code: i.e. `it` or `en-US`
+        :return: `Language` or `None` if not available
+        """
+        self.get_languages()
+        return self._languages_index.get(code)
+
+    def fetch_matches(self, text: str, lang_code: str,
+                      options: Union[dict, None] = None) -> List[dict]:
+        """
+        Send a single check request, `text` must fit in one request.
+        If the client has a cache the request is sent only on a cache miss
+        :param text: the text to check
+        :param lang_code: language code
+        :param options: other request parameters, see `check()`
+        :return: raw `matches` from the response
+        """
+        url = self.url('check')
+        hooks = self.hooks
+        key = None
+        if self.cache is not None:
+            key = make_key(text, lang_code, url, options)
+            matches = self.cache.get(key)
+            if hooks is not None:
+                hooks.on_cache(matches is not None)
+            if matches is not None:
+                if hooks is not None:
+                    hooks.on_matches(lang_code, len(text), len(matches))
+                return matches
+        payload = {'text': text, 'language': lang_code, **(options or {})}
+        # checking has no side effects, it can be retried
+        resp = self.request(url, verb='POST', payload=payload,
+                            idempotent=True)
+        # decoded from the bytes, no need to guess the encoding and copy
+        if hooks is None:
+            matches = fastjson.loads(resp.content).get('matches', list())
+        else:
+            start = time.perf_counter()
+            matches = fastjson.loads(resp.content).get('matches', list())
+            hooks.on_decode(len(resp.content), time.perf_counter() - start)
+            hooks.on_matches(lang_code, len(text), len(matches))
+        if key is not None:
+            self.cache.set(key, matches)
+        return matches
+
+    def _parse(self, matches: List[dict], whitelist) -> List[Error]:
+        """`Error.parse()` timed for the hooks, if any"""
+        if self.hooks is None:
+            return Error.parse({'matches': matches}, whitelist,
+                               self.keep_data, self.skip_fields)
+        start = time.perf_counter()
+        errors = Error.parse({'matches': matches}, list(), self.keep_data,
+                             self.skip_fields)
+        parsed = time.perf_counter()
+        whitelist = Whitelist.coerce(whitelist)
+        if whitelist:
+            Error.update_whitelisted(errors, whitelist)
+        self.hooks.on_parse(len(errors), parsed - start,
+                            time.perf_counter() - parsed)
+        return errors
+
+    def _iter_parse(self, matches: List[dict], whitelist) -> Iterator[Error]:
+        """
+        `Error.iter_parse()`, or the timed `_parse()` with hooks: the
+        matches of a single request are few
+        """
+        if self.hooks is None:
+            return Error.iter_parse({'matches': matches}, whitelist,
+                                    self.keep_data, self.skip_fields)
+        return iter(self._parse(matches, whitelist))
+
+    def check(self, text: str, lang_code: str, whitelist=None,
+              max_chars_per_req: int = 20000,
+              chunk: bool = False, workers: int = 1,
+              options: Union[dict, None] = None) -> List[Error]:
+        """
+        Send `text` for the spell check with `language`, see `check()`
+        :return: list of `Error` objects
+        """
+        check_chars, len_chars = _check_chars_for_req(text, max_chars_per_req)
+        if check_chars and not chunk:
+            raise PyLangToolWrapperException(
+                f"Too many characters in text\nAllowed: {max_chars_per_req})\n"
+                f"Present: {len_chars}")
+
+        chunks = (split_text(text, max_chars_per_req) if check_chars
+                  else [(0, text)])
+
+        def fetch(item: Tuple[int, str]) -> List[dict]:
+            offset, piece = item
+            return _rebase(self.fetch_matches(piece, lang_code, options),
+                           offset)
+
+        if workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(fetch, chunks))
+        else:
+            results = [fetch(item) for item in chunks]
+        matches = [match for result in results for match in result]
+        return self._parse(matches, whitelist or list())
+
+    def check_many(self, texts: List[str], lang_code: str, whitelist=None,
+                   max_chars_per_req: int = 20000,
+                   options: Union[dict, None] = None,
+                   workers: int = 1) -> List[List[Error]]:
+        """
+        Check many short texts with few requests, see `check_many()`
+        :return: list of `Error` lists, one for each text
+        """
+        whitelist = Whitelist.coerce(whitelist)
+        return [self._parse(matches, whitelist)
+                for matches in self.fetch_many(texts, lang_code,
+                                               max_chars_per_req, options,
+                                               workers)]
+
+    def fetch_many(self, texts: List[str], lang_code: str,
+                   max_chars_per_req: int = 20000,
+                   options: Union[dict, None] = None,
+                   workers: int = 1) -> List[List[dict]]:
+        """
+        Pack `texts` in as few requests as possible, see `check_many()`
+        :return: list of the raw matches for each text, offsets relative to
+                 the text
+        """
+        texts = list(texts)
+
+        def fetch(pack: List[int]) -> List[List[dict]]:
+            if len(texts[pack[0]]) > max_chars_per_req:
+                # too long to be packed, checked by itself in chunks
+                matches = list()
+                for offset, piece in split_text(texts[pack[0]],
+                                                max_chars_per_req):
+                    matches.extend(_rebase(
+                        self.fetch_matches(piece, lang_code, options), offset
+                    ))
+                return [matches]
+            starts = list()
+            pos = 0
+            for item in pack:
+                starts.append(pos)
+                pos += len(texts[item]) + len(PACK_SEPARATOR)
+            packed = PACK_SEPARATOR.join(texts[item] for item in pack)
+            return _unpack(self.fetch_matches(packed, lang_code, options),
+                           starts, [len(texts[item]) for item in pack])
+
+        packs = _pack(texts, max_chars_per_req)
+        if workers > 1 and len(packs) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(fetch, packs))
+        else:
+            results = [fetch(pack) for pack in packs]
+        matches = [list() for _ in texts]
+        for pack, pack_matches in zip(packs, results):
+            for item, text_matches in zip(pack, pack_matches):
+                matches[item] = text_matches
+        return matches
+
+    def check_stream(self, fileobj: IO, lang_code: str, whitelist=None,
+                     max_chars_per_req: int = 20000,
+                     options: Union[dict, None] = None,
+                     encoding: str = 'utf-8') -> Iterator[Error]:
+        """
+        Check a text read from `fileobj`, see `check_stream()`
+        :return: generator of `Error` objects
+        """
+        whitelist = Whitelist.coerce(whitelist)
+        decoder = None
+        buffer = ''
+        base = 0  # position of `buffer` in the whole text
+        eof = False
+        while True:
+            while not eof and len(buffer) < max_chars_per_req:
+                data = fileobj.read(max_chars_per_req - len(buffer))
+                eof = not data
+                if isinstance(data, bytes):
+                    if decoder is None:
+                        decoder = codecs.getincrementaldecoder(encoding)()
+                    data = decoder.decode(data, final=eof)
+                buffer += data
+            if not buffer:
+                return
+            if eof and len(buffer) <= max_chars_per_req:
+                window = buffer
+            else:
+                window = buffer[:_find_cut(buffer[:max_chars_per_req])]
+            matches = _rebase(self.fetch_matches(window, lang_code, options),
+                              base)
+            yield from self._iter_parse(matches, whitelist)
+            base += len(window)
+            buffer = buffer[len(window):]
+
+    def check_file(self, path: str, lang_code: str, whitelist=None,
+                   max_chars_per_req: int = 20000,
+                   options: Union[dict, None] = None) -> Iterator[FileError]:
+        """
+        Check an utf-8 text file through a memory map, see `check_file()`
+        :return: generator of `FileError`
+        """
+        whitelist = Whitelist.coerce(whitelist)
+        with open(path, 'rb') as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                size = len(buffer)
+                byte_base = char_base = 0
+                while byte_base < size:
+                    # a window of max_chars_per_req bytes never has more
+                    # chars than that
+                    end = min(byte_base + max_chars_per_req, size)
+                    if end < size:
+                        end = _find_byte_cut(buffer, byte_base, end)
+                    with memoryview(buffer) as view:
+                        window = str(view[byte_base:end], 'utf-8')
+                    matches = sorted(
+                        self.fetch_matches(window, lang_code, options),
+                        key=lambda item: item['offset']
+                    )
+                    positions = _byte_offsets(window, matches)
+                    _rebase(matches, char_base)
+                    for (start, stop), error in zip(
+                            positions, self._iter_parse(matches, whitelist)):
+                        yield FileError(byte_base + start, byte_base + stop,
+                                        error)
+                    byte_base = end
+                    char_base += len(window)
+
+
+_client: Union[LanguageToolClient, None] = None
+
+
+def get_client() -> LanguageToolClient:
+    """
+    The client shared by the module level functions, created on first use
+    :return: `LanguageToolClient`
+    """
+    global _client
+    if _client is None:
+        _client = LanguageToolClient()
+    return _client
+
+
+def set_client(client: Union[LanguageToolClient, None]):
+    """
+    Replace the shared client, i.e. to change pool size or timeouts.
+    With `None` a default one will be created on next use
+    :param client: `LanguageToolClient` or `None`
+    """
+    global _client
+    _client = client
+
+
 def _get_req(url: str, verb: str = 'GET',
              payload: Union[dict, None] = None,
              ua: Union[str, None] = None) -> requests.Response:
     """
-    Manage request
+    Manage request through the shared client
     :param url: the API REST endpoint
     :param verb:
     :param payload: paramenters for request
     :param ua: user agent string
     :return: response in json format
     """
-    headers = {'user-agent': ua or USER_AGENT}
-    if verb == 'GET':
-        r = requests.get(url, headers=headers)
-    elif verb == 'POST':
-        r = requests.post(url, headers=headers, data=payload)
-    else:
-        raise PyLangToolWrapperException('not a valid verb for this API')
-    if r.status_code != 200:
-        raise PyLangToolWrapperException(f"Error {r.status_code}\n{r.text}")
-    return r
+    return get_client().request(url, verb, payload, ua)
 
 
-def get_languages() -> List[Language]:
+def get_languages(refresh: bool = False) -> List[Language]:
     """
-    Get available languages
+    Get available languages, the list is cached (see `LANGUAGES_TTL`)
+    :param refresh: fetch the list from the API anyway
     :return: list
     """
-    url = f"{ROUTES['base']}{ROUTES['languages']}"
-    resp = _get_req(url)
-    languages = list()
-    for record in resp.json():
-        languages.append(
-            Language(record['name'], record['code'], record['longCode'])
-        )
-    return languages
+    return get_client().get_languages(refresh)
 
 
-def _check_chars_for_req(text: str, max_chars: int) -> tuple:
+def get_language(code: str) -> Union[Language, None]:
     """
-    Check `text` lenght against `max_chars`, blank spaces included because it's
-    :param text:
-    :param max_chars:
-    :return: True if chars in `text` > `max_chars` and the total chars in `text`
+    Find an available language by `code` or `long_code`
+    :param code: i.e. `it` or `en-US`
+    :return: `Language` or `None` if not available
     """
-    return len(text) > max_chars, len(text)
+    return get_client().get_language(code)
+
+
+def check_many(texts: List[str], lang_code: str, whitelist=None,
+               max_chars_per_req: int = 20000,
+               options: Union[dict, None] = None,
+               workers: int = 1) -> List[List[Error]]:
+    """
+    Check many short texts (titles, captions, messages ...) packing as many
+    as fit in `max_chars_per_req` in a single request, separated by a blank
+    line. Errors spanning two texts are dropped
+    :param texts: the texts to check
+    :param lang_code: language code
+    :param whitelist: `whitelist.Whitelist` or list of words to ignore
+    :param max_chars_per_req: chars allowed for request
+    :param options: other parameters for the API, see `check()`
+    :param workers: requests sent at the same time
+    :return: list of `Error` lists, one for each text in the same order,
+             offsets relative to the text
+    """
+    return get_client().check_many(texts, lang_code, whitelist,
+                                   max_chars_per_req, options, workers)
+
+
+def check_stream(fileobj: IO, lang_code: str, whitelist=None,
+                 max_chars_per_req: int = 20000,
+                 options: Union[dict, None] = None,
+                 encoding: str = 'utf-8') -> Iterator[Error]:
+    """
+    Check the text read from `fileobj` (a file, `sys.stdin`, ...) a window at
+    a time, so memory depends on `max_chars_per_req` and not on the text
+    size. The windows are cut on paragraph/sentence boundaries like
+    `check(chunk=True)`
+    :param fileobj: open for reading, in text or binary mode
+    :param lang_code: language code
+    :param whitelist: `whitelist.Whitelist` or list of words to ignore
+    :param max_chars_per_req: max chars of each window
+    :param options: other parameters for the API, see `check()`
+    :param encoding: used if `fileobj` is open in binary mode
+    :return: generator of `Error` objects, with offsets relative to the whole
+             text, yielded as soon as each window is checked
+    """
+    return get_client().check_stream(fileobj, lang_code, whitelist,
+                                     max_chars_per_req, options, encoding)
+
+
+def check_file(path: str, lang_code: str, whitelist=None,
+               max_chars_per_req: int = 20000,
+               options: Union[dict, None] = None) -> Iterator[FileError]:
+    """
+    Check an utf-8 text file without reading it all: the file is memory
+    mapped (several processes checking the same file share its pages) and
+    only the window being sent is decoded
+    :param path: the file to check
+    :param lang_code: language code
+    :param whitelist: `whitelist.Whitelist` or list of words to ignore
+    :param max_chars_per_req: max bytes of each window
+    :param options: other parameters for the API, see `check()`
+    :return: generator of `FileError` (byte_start, byte_end, error), the
+             `error` offsets are chars from the start of the file
+    """
+    return get_client().check_file(path, lang_code, whitelist,
+                                   max_chars_per_req, options)
 
 
 def check(text: str, lang_code: str, whitelist=None,
-          max_chars_per_req: int = 20000) -> List[Error]:
+          max_chars_per_req: int = 20000, chunk: bool = False,
+          workers: int = 1, options: Union[dict, None] = None) -> List[Error]:
     """
     Main function: send `text` for the spell check with `language`
     :param text: the text to check
     :param lang_code: language code, you can retrieve the code by calling first
                        `get_language()` - **No check first will be performed**
-    :param whitelist: list of words to ignore. The errors remains but they will
-                      be tagged with `is_whitelisted = True`, then the consumer
-                      can manage the object as he pleases.
+    :param whitelist: `whitelist.Whitelist` or list of words to ignore. The
+                      errors remains but they will be tagged with
+                      `is_whitelisted = True`, then the consumer can manage
+                      the object as he pleases.
     :param max_chars_per_req: for the free plan there is a limit of
                                     20000 (as per 2021-05-03) character for
                                     request. If the value is > 0 a check for
                                     the chars in `text` will be performed and a
                                     `PyLangToolWrapperException` will be raised
-    :
+    :param chunk: instead of raising, split a `text` longer than
+                  `max_chars_per_req` on paragraph/sentence boundaries and
+                  send the pieces, the errors offsets are relative to the
+                  whole `text`
+    :param workers: with `chunk`, send up to `workers` chunks at the same
+                    time; the errors keep the text order. The shared client
+                    `max_in_flight` (see `set_client()`) still applies
+    :param options: other parameters for the API, i.e.
+                    `{'disabledRules': 'WHITESPACE_RULE', 'level': 'picky'}`
     :return: list of `Error` objects
     """
-    check_chars, len_chars = _check_chars_for_req(text, max_chars_per_req)
-    if check_chars:
-        raise PyLangToolWrapperException(
-            f"Too many characters in text\nAllowed: {max_chars_per_req})\n"
-            f"Present: {len_chars}")
-
-    url = f"{ROUTES['base']}{ROUTES['check']}"
-    payload = {'text': text, 'language': lang_code}
-    resp = _get_req(url, verb='POST', payload=payload)
-    errors = Error.parse(resp.json(), whitelist or list())
-    return errors
+    return get_client().check(text, lang_code, whitelist, max_chars_per_req,
+                              chunk, workers, options)
 
 
 if __name__ == '__main__':
-    pass
+    import sys
+    from cli import main
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# ratelimit.py
+
+from email.utils import parsedate_to_datetime
+import threading
+import time
+from typing import Union
+
+__doc__ = """Client side throttling: token buckets for the requests and
+characters per minute and an AIMD (additive increase, multiplicative
+decrease) limit of the concurrent requests, backing off when the server
+answers 429/503
+"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+# Free plan limits (as per https://languagetool.org/http-api/)
+FREE_PLAN_REQUESTS_PER_MINUTE = 20
+FREE_PLAN_CHARS_PER_MINUTE = 75000
+
+# Responses asking to slow down
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Union[str, None]) -> Union[float, None]:
+    """
+    :param value: `Retry-After` header, seconds or HTTP date
+    :return: seconds to wait, `None` if missing or not valid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Tokens refilled at a steady rate, `acquire()` waits for them"""
+
+    def __init__(self, rate_per_minute: float,
+                 capacity: Union[float, None] = None):
+        """
+        :param rate_per_minute: tokens added every minute
+        :param capacity: max tokens stored, that is the max burst, defaults
+                         to `rate_per_minute`
+        """
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Take `amount` tokens, waiting until they are available. An amount
+        bigger than the capacity takes the whole bucket
+        :return: seconds waited
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= amount:
+                        self._tokens -= amount
+                        return waited
+                    wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for `seconds`, i.e. after a `Retry-After`"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0
+            self._paused_until = max(self._paused_until, now + seconds)
+
+
+class RateLimiter:
+    """Requests and characters per minute limits, shared by all threads"""
+
+    def __init__(self,
+                 requests_per_minute: float = FREE_PLAN_REQUESTS_PER_MINUTE,
+                 chars_per_minute: Union[float, None] =
+                 FREE_PLAN_CHARS_PER_MINUTE):
+        """
+        :param requests_per_minute: `None` for no limit
+        :param chars_per_minute: `None` for no limit
+        """
+        self.requests = (TokenBucket(requests_per_minute)
+                         if requests_per_minute else None)
+        self.chars = (TokenBucket(chars_per_minute)
+                      if chars_per_minute else None)
+
+    def acquire(self, chars: int = 0) -> float:
+        """
+        Wait until a request with `chars` characters can be sent
+        :return: seconds waited
+        """
+        waited = 0.0
+        if self.requests is not None:
+            waited += self.requests.acquire()
+        if self.chars is not None and chars:
+            waited += self.chars.acquire(chars)
+        return waited
+
+    def pause(self, seconds: float):
+        """Hold all the requests for `seconds`"""
+        for bucket in (self.requests, self.chars):
+            if bucket is not None:
+                bucket.pause(seconds)
+
+
+class AdaptiveConcurrency:
+    """
+    Max concurrent requests adjusted on the responses: +1 every `limit`
+    successful responses, halved on a 429/503
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1,
+                 maximum: int = 32, decrease: float = 0.5):
+        """
+        :param initial: starting limit
+        :param minimum: the limit never goes below
+        :param maximum: the limit never goes above
+        :param decrease: factor applied to the limit on a throttled response
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self):
+        """Wait for a free slot"""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, status: Union[int, None] = None):
+        """
+        Free the slot and adjust the limit
+        :param status: HTTP status of the response, `None` if it failed
+                       without one (the limit is not changed)
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if status in THROTTLE_STATUSES:
+                self._limit = max(self.minimum, self._limit * self.decrease)
+            elif status == 200:
+                self._limit = min(self.maximum,
+                                  self._limit + 1 / max(self._limit, 1))
+            self._cond.notify_all()
+
+
+if __name__ == '__main__':
+    pass
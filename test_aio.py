@@ -0,0 +1,92 @@
+# test_aio
+
+import asyncio
+import socket
+import unittest
+import aio
+import pylangtoolwrapper as pylt
+from mockserver import MockLanguageTool
+
+__doc__ = """test_aio"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+TEXT = 'Una frase da controllare, con qualche errore qua e là. ' * 40
+
+
+@unittest.skipIf(aio.aiohttp is None, 'aiohttp not installed')
+class TestAsyncClient(unittest.TestCase):
+
+    def test_languages(self):
+        async def run(client):
+            async with client:
+                return await client.get_languages()
+
+        with MockLanguageTool() as server:
+            languages = asyncio.run(run(
+                aio.AsyncLanguageToolClient(server.base_url)))
+        self.assertIn('it', [lang.code for lang in languages])
+
+    def test_chunked_check(self):
+        async def run(client):
+            async with client:
+                return await client.check(TEXT, 'it', max_chars_per_req=300,
+                                          chunk=True)
+
+        with MockLanguageTool() as server:
+            serial = pylt.LanguageToolClient(server.base_url,
+                                             languages_file=None)
+            expected = serial.check(TEXT, 'it', max_chars_per_req=300,
+                                    chunk=True)
+            serial.close()
+        with MockLanguageTool(latency=0.02) as server:
+            errors = asyncio.run(run(aio.AsyncLanguageToolClient(
+                server.base_url, max_in_flight=2)))
+            self.assertGreater(server.requests, 2)
+            self.assertEqual(server.peak_in_flight, 2)
+        self.assertEqual([error.absolute_position() for error in errors],
+                         [error.absolute_position() for error in expected])
+
+    def test_not_200(self):
+        async def run(client):
+            async with client:
+                return await client.check('testo', 'it')
+
+        with MockLanguageTool(error_rate=1, error_statuses=(500, )) as server:
+            self.assertRaises(
+                pylt.PyLangToolWrapperException, asyncio.run,
+                run(aio.AsyncLanguageToolClient(server.base_url)))
+
+    def test_failures_wrapped(self):
+        async def run(client):
+            async with client:
+                return await client.get_languages()
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            dead = f'http://127.0.0.1:{sock.getsockname()[1]}/v2/'
+        self.assertRaises(pylt.PyLangToolWrapperRetryableException,
+                          asyncio.run, run(aio.AsyncLanguageToolClient(dead)))
+        with MockLanguageTool(latency=0.5) as server:
+            self.assertRaises(
+                pylt.PyLangToolWrapperRetryableException, asyncio.run,
+                run(aio.AsyncLanguageToolClient(server.base_url,
+                                                timeout=0.1)))
+        self.assertRaises(
+            pylt.PyLangToolWrapperFatalException, asyncio.run,
+            run(aio.AsyncLanguageToolClient('http:///v2/')))
+
+    def test_shared_client_many_loops(self):
+        with MockLanguageTool() as server:
+            aio.set_client(aio.AsyncLanguageToolClient(server.base_url,
+                                                       max_in_flight=2))
+            try:
+                for _ in range(2):
+                    errors = asyncio.run(aio.check(TEXT, 'it', chunk=True,
+                                                   max_chars_per_req=300))
+                    self.assertTrue(errors)
+                asyncio.run(aio.get_client().close())
+            finally:
+                aio.set_client(None)
@@ -0,0 +1,53 @@
+# test_batch
+
+import unittest
+from entities import Error
+import batch
+from test_entities import _match
+
+__doc__ = """test_batch"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+@unittest.skipIf(batch.np is None, 'numpy not installed')
+class TestErrorBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.responses = [
+            {'matches': [_match(0), _match(1500, 'sbaglio', 'grammar')]},
+            {'matches': [_match(10, 'parola')]},
+        ]
+        self.batch = batch.ErrorBatch.from_responses(self.responses,
+                                                     ['parola'])
+
+    def test_filters_match_error_filters(self):
+        errors = [error for response in self.responses
+                  for error in Error.parse(response, ['parola'])]
+        self.assertEqual(len(self.batch.spell_errors()),
+                         len(Error.spell_errors(errors)))
+        self.assertEqual(len(self.batch.whitelist_filtered()),
+                         len(Error.whitelist_filtered(errors)))
+
+    def test_count_by(self):
+        self.assertEqual(self.batch.count_by('issue_type'),
+                         {'misspelling': 2, 'grammar': 1})
+        self.assertEqual(self.batch.count_by('document'), {0: 2, 1: 1})
+        self.assertEqual(self.batch.offset_histogram(1000), {0: 2, 1000: 1})
+
+    def test_to_errors(self):
+        errors = self.batch.whitelist_filtered().to_errors()
+        self.assertEqual([error.text_error for error in errors],
+                         ['xxabc', 'sbaglio'])
+
+    def test_from_errors(self):
+        errors = Error.parse(self.responses[0], list())
+        other = batch.ErrorBatch.from_errors(errors)
+        self.assertEqual(other.count_by('rule'), {'MORFOLOGIK_RULE_IT_IT': 2})
+        self.assertIs(other.to_errors()[0], errors[0])
+
+    def test_empty(self):
+        empty = batch.ErrorBatch.from_responses([{'matches': []}])
+        self.assertEqual(len(empty.spell_errors()), 0)
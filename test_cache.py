@@ -0,0 +1,157 @@
+# test_cache
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+import pylangtoolwrapper as pylt
+import cache
+
+__doc__ = """test_cache"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+MATCHES = [{'offset': 0, 'length': 4, 'message': 'Spelling'}]
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_key_depends_on_options(self):
+        url = f"{pylt.ROUTES['base']}check"
+        self.assertNotEqual(
+            cache.make_key('text', 'it', url),
+            cache.make_key('text', 'it', url, {'level': 'picky'})
+        )
+
+    def test_hit_and_miss(self):
+        mc = cache.MemoryCache()
+        self.assertIsNone(mc.get('a'))
+        mc.set('a', MATCHES)
+        self.assertEqual(mc.get('a'), MATCHES)
+        self.assertEqual((mc.hits, mc.misses), (1, 1))
+
+    def test_counts_from_threads(self):
+        mc = cache.MemoryCache()
+        mc.set('a', MATCHES)
+
+        def lookups():
+            for _ in range(2000):
+                mc.get('a')
+                mc.get('b')
+
+        threads = [threading.Thread(target=lookups) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((mc.hits, mc.misses), (16000, 16000))
+
+    def test_get_returns_a_copy(self):
+        mc = cache.MemoryCache()
+        mc.set('a', MATCHES)
+        mc.get('a')[0]['offset'] = 10
+        self.assertEqual(mc.get('a')[0]['offset'], 0)
+
+    def test_lru_eviction_by_entries(self):
+        mc = cache.MemoryCache(max_entries=2)
+        mc.set('a', MATCHES)
+        mc.set('b', MATCHES)
+        mc.get('a')
+        mc.set('c', MATCHES)
+        self.assertIsNone(mc.get('b'))
+        self.assertIsNotNone(mc.get('a'))
+
+    def test_eviction_by_bytes(self):
+        mc = cache.MemoryCache(max_bytes=100)
+        mc.set('a', MATCHES)
+        mc.set('b', MATCHES)
+        self.assertEqual(len(mc), 1)
+        self.assertLessEqual(mc.size, 100)
+
+    def test_size_in_bytes(self):
+        matches = [{'offset': 0, 'length': 4, 'message': 'è perché così'}]
+        mc = cache.MemoryCache()
+        mc.set('a', matches)
+        self.assertEqual(mc.size, len(json.dumps(
+            matches, ensure_ascii=False).encode('utf-8')))
+        self.assertEqual(mc.get('a'), matches)
+
+
+class TestSqliteCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'cache.db')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_shared_between_instances(self):
+        first = cache.SqliteCache(self.path)
+        first.set('a', MATCHES)
+        first.close()
+        second = cache.SqliteCache(self.path)
+        self.assertEqual(second.get('a'), MATCHES)
+        second.close()
+
+    def test_ttl_expiry(self):
+        sc = cache.SqliteCache(self.path, ttl=0.01)
+        sc.set('a', MATCHES)
+        time.sleep(0.05)
+        self.assertIsNone(sc.get('a'))
+        sc.close()
+
+    def test_prune_keeps_recently_used(self):
+        sc = cache.SqliteCache(self.path, max_entries=2)
+        for key in 'abc':
+            sc.set(key, MATCHES)
+            time.sleep(0.01)
+        sc.get('a')
+        self.assertEqual(sc.prune(), 1)
+        self.assertIsNone(sc.get('b'))
+        self.assertIsNotNone(sc.get('a'))
+        sc.close()
+
+    def test_size_in_bytes(self):
+        matches = [{'offset': 0, 'length': 4, 'message': 'è perché così'}]
+        sc = cache.SqliteCache(self.path)
+        sc.set('a', matches)
+        self.assertEqual(sc.stats()['bytes'], len(json.dumps(
+            matches, ensure_ascii=False).encode('utf-8')))
+        sc.close()
+
+    def test_close_all_threads(self):
+        sc = cache.SqliteCache(self.path)
+        conns = [sc._connect()]
+
+        def use():
+            sc.set('a', MATCHES)
+            conns.append(sc._connect())
+
+        thread = threading.Thread(target=use)
+        thread.start()
+        thread.join()
+        self.assertIsNot(conns[0], conns[1])
+        sc.close()
+        for conn in conns:
+            with self.assertRaisesRegex(sqlite3.ProgrammingError, 'closed'):
+                conn.execute('SELECT 1')
+        # usable again, with a new connection
+        self.assertEqual(sc.get('a'), MATCHES)
+        sc.close()
+
+    def test_finished_threads_connections_closed(self):
+        sc = cache.SqliteCache(self.path)
+        sc.set('a', MATCHES)
+        for _ in range(20):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: sc.get('a'), range(8)))
+        # at most the last pool's workers and this thread
+        self.assertLessEqual(len(sc._conns), 5)
+        sc.close()
@@ -0,0 +1,110 @@
+# test_cli
+
+from contextlib import redirect_stderr, redirect_stdout
+import io
+import json
+import os
+import tempfile
+import unittest
+import cli
+import pylangtoolwrapper as pylt
+from mockserver import MockLanguageTool
+
+__doc__ = """test_cli"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class TestExpandPaths(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = self._tmp.name
+        os.makedirs(os.path.join(self.folder, 'sub'))
+        for fn in ('a.txt', 'b.md', os.path.join('sub', 'c.txt')):
+            with open(os.path.join(self.folder, fn), mode='w') as fh:
+                fh.write('testo')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_directory(self):
+        found = cli.expand_paths([self.folder])
+        self.assertEqual(sorted(os.path.basename(fn) for fn in found),
+                         ['a.txt', 'c.txt'])
+
+    def test_glob_and_duplicates(self):
+        a = os.path.join(self.folder, 'a.txt')
+        found = cli.expand_paths([os.path.join(self.folder, '*.md'), a, a])
+        self.assertEqual(found, [os.path.join(self.folder, 'b.md'), a])
+
+
+class TestCheckCommand(unittest.TestCase):
+    # a match every 80 chars, the first one is a misspelling of 'Ciao'
+    text = 'Ciao mondo, questa è una frase. ' * 8
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.fn = os.path.join(self._tmp.name, 'a.txt')
+        with open(self.fn, mode='w', encoding='utf-8') as fh:
+            fh.write(self.text)
+        self.whitelist = os.path.join(self._tmp.name, 'whitelist.txt')
+        with open(self.whitelist, mode='w', encoding='utf-8') as fh:
+            fh.write('ci*\n')
+        self.server = MockLanguageTool().start()
+        self.addCleanup(self.server.stop)
+        previous = pylt._client
+        self.addCleanup(setattr, pylt, '_client', previous)
+
+    def _main(self, *args):
+        """:return: (exit status, stdout records, stderr)"""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            status = cli.main(['check', '-l', 'it', '-w', '1',
+                               '--base-url', self.server.base_url,
+                               '--whitelist', self.whitelist, *args])
+        pylt.get_client().close()
+        records = [json.loads(line) for line in stdout.getvalue().split('\n')
+                   if line]
+        return status, records, stderr.getvalue()
+
+    def test_records_and_summary(self):
+        status, records, stderr = self._main(self.fn)
+        self.assertEqual(status, 0)
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[0], {
+            'path': self.fn, 'offset': 0, 'length': 4,
+            'rule': 'MORFOLOGIK_RULE_IT_IT', 'suggestions': ['ciao', 'Ciao'],
+            'word': 'Ciao', 'whitelisted': True})
+        for record in records:
+            self.assertEqual(
+                self.text[record['offset']:][:record['length']],
+                record['word'])
+        self.assertIn(f'files: 1 (failed 0), errors: 4, '
+                      f'chars: {len(self.text)}', stderr)
+
+    def test_filters(self):
+        _, records, _ = self._main(self.fn, '--misspelling-only')
+        self.assertEqual([record['word'] for record in records],
+                         ['Ciao'])
+        _, records, _ = self._main(self.fn, '--ignore-whitelisted')
+        self.assertEqual(len(records), 3)
+        self.assertFalse(any(record['whitelisted'] for record in records))
+
+    def test_failed_file(self):
+        missing = os.path.join(self._tmp.name, 'missing.txt')
+        status, records, stderr = self._main(self.fn, missing)
+        self.assertEqual(status, 1)
+        self.assertEqual(len(records), 4)
+        self.assertIn(f'{missing}: ', stderr)
+        self.assertIn('files: 2 (failed 1), errors: 4', stderr)
+
+    def test_invalid_whitelist(self):
+        with open(self.whitelist, mode='w', encoding='utf-8') as fh:
+            fh.write('re:(\n')
+        status, records, stderr = self._main(self.fn)
+        self.assertEqual((status, records), (2, []))
+        self.assertIn(self.whitelist, stderr)
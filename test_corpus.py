@@ -0,0 +1,57 @@
+# test_corpus
+
+import os
+import tempfile
+import unittest
+import corpus
+from mockserver import MockLanguageTool
+
+__doc__ = """test_corpus"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def test_read_checkpoint(self):
+        with tempfile.TemporaryDirectory() as folder:
+            fn = os.path.join(folder, 'checkpoint.jsonl')
+            self.assertEqual(corpus.read_checkpoint(fn), set())
+            with open(fn, mode='w') as fh:
+                fh.write('{"id": "a", "errors": [[0, 3, "RULE"]]}\n'
+                         '{"id": "b", "errors": [], "failed": "timeout"}\n'
+                         '{"id": "c", "err')
+            self.assertEqual(corpus.read_checkpoint(fn), {'a'})
+
+
+class TestCorpusRunner(unittest.TestCase):
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as folder, \
+                MockLanguageTool() as server:
+            documents = list()
+            for doc_id in ('d1', 'd2', 'd3'):
+                fn = os.path.join(folder, f'{doc_id}.txt')
+                with open(fn, mode='w', encoding='utf-8') as fh:
+                    fh.write('Una frase da controllare, con errori. ' * 10)
+                documents.append((doc_id, fn))
+            documents.append(('missing', os.path.join(folder, 'none.txt')))
+            checkpoint = os.path.join(folder, 'checkpoint.jsonl')
+            with open(checkpoint, mode='w') as fh:
+                # d2 torn by an interrupted run
+                fh.write('{"id": "d1", "errors": []}\n{"id": "d2", "err')
+            runner = corpus.CorpusRunner('it', checkpoint, processes=1,
+                                         base_url=server.base_url)
+
+            stats = runner.run(documents)
+            self.assertEqual((stats.done, stats.skipped, stats.failed),
+                             (2, 1, 1))
+            self.assertGreater(stats.errors, 0)
+            self.assertEqual(corpus.read_checkpoint(checkpoint),
+                             {'d1', 'd2', 'd3'})
+
+            stats = runner.run(documents)
+            self.assertEqual((stats.done, stats.skipped, stats.failed),
+                             (0, 3, 1))
@@ -0,0 +1,45 @@
+# test_dedup
+
+import unittest
+import dedup
+from testhelpers import FakeClient
+
+__doc__ = """test_dedup"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class TestSplitSentences(unittest.TestCase):
+
+    def test_split(self):
+        text = 'Uno. Due!  Tre\nquattro   \n\n  Cinque... ok'
+        self.assertEqual(dedup.split_sentences(text),
+                         [(0, 'Uno.'), (5, 'Due!'), (11, 'Tre'),
+                          (15, 'quattro'), (29, 'Cinque...'), (39, 'ok')])
+
+
+class TestCheckDeduplicated(unittest.TestCase):
+
+    def test_fan_out(self):
+        footer = 'Messaggio riservato xx. Cancellatelo se non serve.'
+        texts = [f'Documento {pos} con xx.\n{footer}' for pos in range(20)]
+        client = FakeClient()
+        results, stats = dedup.check_deduplicated(texts, 'it', client=client)
+        self.assertEqual(stats.sentences, 60)
+        self.assertEqual(stats.unique, 22)
+        self.assertAlmostEqual(dedup.dedup_ratio(stats), 1 - 22 / 60)
+        sent = ''.join(client.sent)
+        self.assertEqual(sent.count('Messaggio riservato xx.'), 1)
+        for text, errors in zip(texts, results):
+            self.assertEqual(len(errors), 2)
+            for error in errors:
+                start, end, _ = error.absolute_position()
+                self.assertEqual(text[start:end], 'xx')
+
+    def test_empty(self):
+        results, stats = dedup.check_deduplicated(
+            ['', '  '], 'it', client=FakeClient())
+        self.assertEqual(results, [[], []])
+        self.assertEqual(dedup.dedup_ratio(stats), 0.0)
@@ -0,0 +1,108 @@
+# test_endpoints
+
+import socket
+import time
+import unittest
+import endpoints
+import pylangtoolwrapper as pylt
+from mockserver import MockLanguageTool
+
+__doc__ = """test_endpoints"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+URLS = ['http://a/v2/', 'http://b/v2/', 'http://c/v2/']
+
+
+class TestEndpointPool(unittest.TestCase):
+
+    def test_round_robin(self):
+        pool = endpoints.EndpointPool(URLS)
+        chosen = list()
+        for _ in range(6):
+            endpoint = pool.acquire()
+            chosen.append(endpoint.url)
+            pool.release(endpoint, True)
+        self.assertEqual(chosen, URLS * 2)
+
+    def test_least_outstanding(self):
+        pool = endpoints.EndpointPool(URLS, endpoints.LEAST_OUTSTANDING)
+        busy = [pool.acquire(), pool.acquire()]
+        self.assertEqual(pool.acquire().url, 'http://c/v2/')
+        pool.release(busy[0], True)
+        self.assertEqual(pool.acquire().url, 'http://a/v2/')
+
+    def test_ejection(self):
+        pool = endpoints.EndpointPool(URLS[:2], max_failures=2)
+        for _ in range(2):
+            pool.release(self._take(pool, 'http://a/v2/'), False)
+        self.assertEqual({pool.acquire().url for _ in range(4)},
+                         {'http://b/v2/'})
+
+    def test_health_check(self):
+        pool = endpoints.EndpointPool(URLS[:2])
+        pool.health_check(lambda url: url == 'http://b/v2/')
+        self.assertEqual(pool.acquire().url, 'http://b/v2/')
+        pool.health_check(lambda url: True)
+        self.assertEqual({pool.acquire().url for _ in range(2)},
+                         set(URLS[:2]))
+
+    @staticmethod
+    def _take(pool, url):
+        while True:
+            endpoint = pool.acquire()
+            if endpoint.url == url:
+                return endpoint
+            pool.release(endpoint, True)
+
+
+def _dead_url() -> str:
+    """:return: an API root where nothing listens"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/v2/'
+
+
+class TestClientFailover(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockLanguageTool().start()
+        self.addCleanup(self.server.stop)
+        self.dead = _dead_url()
+        self.client = pylt.LanguageToolClient(
+            [self.dead, self.server.base_url], languages_file=None,
+            retry=pylt.RetryPolicy(retries=3, backoff=0))
+        self.addCleanup(self.client.close)
+
+    def _endpoint(self, url):
+        return next(endpoint for endpoint in self.client.endpoints.endpoints
+                    if endpoint.url == url)
+
+    def test_failover_and_ejection(self):
+        for _ in range(6):
+            self.assertTrue(self.client.check('Un xx testo', 'it'))
+        dead = self._endpoint(self.dead)
+        self.assertFalse(dead.available(time.monotonic()))
+        # once ejected every request goes to the live server
+        served = self.server.requests
+        for _ in range(4):
+            self.client.check('Un altro testo', 'it')
+        self.assertEqual(self.server.requests, served + 4)
+        self.assertEqual(dead.requests, 3)
+
+    def test_health_checks(self):
+        self.client.check_health(timeout=1)
+        dead, live = self._endpoint(self.dead), self._endpoint(
+            self.server.base_url)
+        self.assertFalse(dead.available(time.monotonic()))
+        self.assertTrue(live.available(time.monotonic()))
+        thread = self.client.start_health_checks(interval=0.05)
+        time.sleep(0.2)
+        self.assertFalse(dead.available(time.monotonic()))
+        self.assertTrue(live.available(time.monotonic()))
+        self.client.close()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
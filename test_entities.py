@@ -0,0 +1,109 @@
+# test_entities
+
+import unittest
+import pylangtoolwrapper as pylt
+from entities import Error
+
+__doc__ = """test_entities"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+def _match(offset: int, word: str = 'xxabc',
+           issue_type: str = 'misspelling') -> dict:
+    context = f'some text {word} around'
+    return {
+        'message': 'Possible spelling mistake found.',
+        'shortMessage': 'Spelling mistake',
+        'offset': offset,
+        'length': len(word),
+        'replacements': [{'value': 'abc'}, {'value': 'xabc'}],
+        'context': {'text': context, 'offset': 10, 'length': len(word)},
+        'rule': {
+            'id': 'MORFOLOGIK_RULE_IT_IT',
+            'description': 'Possible spelling mistake',
+            'issueType': issue_type,
+            'urls': [{'value': 'https://languagetool.org'}],
+            'category': {'id': 'TYPOS', 'name': 'Possible Typo'}
+        }
+    }
+
+
+class TestError(unittest.TestCase):
+
+    def test_properties(self):
+        error = Error.parse({'matches': [_match(7)]}, list())[0]
+        self.assertEqual(error.absolute_position(), (7, 12, 5))
+        self.assertEqual(error.text_error, 'xxabc')
+        self.assertEqual(error.message_short, 'Spelling mistake')
+        self.assertEqual(error.suggestions, ['abc', 'xabc'])
+        self.assertEqual(error.rule.id, 'MORFOLOGIK_RULE_IT_IT')
+        self.assertEqual(error.rule.category_name, 'Possible Typo')
+        self.assertEqual(error.context.proximity, 'some text xxabc around')
+
+    def test_drop_data(self):
+        error = Error.parse({'matches': [_match(7)]}, ['xxabc'],
+                            keep_data=False)[0]
+        self.assertIsNone(error._data)
+        self.assertIsNone(error.rule._data)
+        self.assertTrue(error.is_whitelisted)
+        self.assertEqual(error.rule.type, 'misspelling')
+
+    def test_drop_data_no_raw_dicts(self):
+        error = Error(_match(7), keep_data=False)
+        self.assertNotIsInstance(error._rule, dict)
+        self.assertNotIsInstance(error._context, dict)
+        self.assertIsNone(error.context._data)
+        self.assertEqual(error.text_error, 'xxabc')
+        self.assertEqual(error.rule_id, 'MORFOLOGIK_RULE_IT_IT')
+
+    def test_skip_fields(self):
+        match = _match(7)
+        error = Error.parse({'matches': [match]}, ['xxabc'], keep_data=False,
+                            skip=('context', 'urls', 'suggestions'))[0]
+        self.assertIsNone(error.context)
+        self.assertEqual(error.text_error, 'xxabc')
+        self.assertTrue(error.is_whitelisted)
+        self.assertEqual(error.suggestions, [])
+        self.assertEqual(error.rule.urls, '')
+        self.assertEqual(error.rule_id, 'MORFOLOGIK_RULE_IT_IT')
+        self.assertIn('urls', match['rule'])
+
+    def test_unknown_skip_field(self):
+        self.assertRaises(pylt.PyLangToolWrapperException,
+                          pylt.LanguageToolClient, languages_file=None,
+                          skip_fields=('message', ))
+
+    def test_slots(self):
+        error = Error(_match(0))
+        self.assertFalse(hasattr(error, '__dict__'))
+        self.assertFalse(hasattr(error.rule.category, '__dict__'))
+
+    def test_filters(self):
+        errors = Error.parse(
+            {'matches': [_match(0), _match(20, 'sbaglio', 'grammar')]},
+            ['sbaglio']
+        )
+        self.assertEqual(len(Error.spell_errors(errors)), 1)
+        self.assertEqual(len(Error.whitelist_filtered(errors)), 1)
+
+
+class TestLazyError(unittest.TestCase):
+
+    def test_sub_objects_built_on_access(self):
+        error = Error(_match(3))
+        self.assertIsInstance(error._rule, dict)
+        self.assertEqual(error.text_error, 'xxabc')
+        self.assertEqual(error.issue_type, 'misspelling')
+        self.assertIsInstance(error._context, dict)
+        self.assertIs(error.rule, error.rule)
+        self.assertEqual(error.context.word, 'xxabc')
+
+    def test_iter_parse(self):
+        data = {'matches': [_match(0), _match(20, 'parola')]}
+        errors = Error.iter_parse(data, ['parola'])
+        self.assertFalse(next(errors).is_whitelisted)
+        self.assertTrue(next(errors).is_whitelisted)
+        self.assertRaises(StopIteration, next, errors)
@@ -0,0 +1,49 @@
+# test_incremental
+
+import unittest
+import incremental
+from testhelpers import FakeClient
+
+__doc__ = """test_incremental"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class TestIncrementalChecker(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeClient()
+        self.checker = incremental.IncrementalChecker('it', self.client)
+
+    def _assert_positions(self, errors, text):
+        for error in errors:
+            start, end, _ = error.absolute_position()
+            self.assertEqual(text[start:end], error.text_error)
+
+    def test_split_paragraphs(self):
+        text = 'one\n\n\ntwo\nlines\n\nthree'
+        pars = incremental.split_paragraphs(text)
+        self.assertEqual([par for _, par in pars],
+                         ['one\n\n\n', 'two\nlines\n\n', 'three'])
+        self.assertEqual(''.join(par for _, par in pars), text)
+
+    def test_only_changed_paragraph_is_sent(self):
+        pars = ['First xxone here.\n\n', 'Second xxtwo.\n\n', 'Third xxtre.']
+        text = ''.join(pars)
+        self._assert_positions(self.checker.check(text), text)
+        self.assertEqual(self.client.sent, [text])
+
+        pars[1] = 'Second paragraph, now longer xxfour.\n\n'
+        text = ''.join(pars)
+        errors = self.checker.check(text)
+        self.assertEqual(self.client.sent[-1], pars[1])
+        self.assertEqual(len(errors), 3)
+        self._assert_positions(errors, text)
+
+    def test_reset(self):
+        self.checker.check('Some xxerr.')
+        self.checker.reset()
+        self.checker.check('Some xxerr.')
+        self.assertEqual(len(self.client.sent), 2)
@@ -0,0 +1,116 @@
+# test_instrumentation
+
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+import aio
+import pylangtoolwrapper as pylt
+from cache import MemoryCache
+from instrumentation import Hooks, MultiHooks, StatsHooks
+from mockserver import MockLanguageTool
+
+__doc__ = """test_instrumentation"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class _Recorder(Hooks):
+
+    def __init__(self):
+        self.calls = list()
+
+    def on_request(self, url, verb, status, *args):
+        self.calls.append(('request', verb, status))
+
+    def on_cache(self, hit):
+        self.calls.append(('cache', hit))
+
+
+class TestHooks(unittest.TestCase):
+    text = 'Una frase da controllare, con qualche errore qua e là. ' * 10
+
+    def test_check(self):
+        stats, recorder = StatsHooks(), _Recorder()
+        with MockLanguageTool() as server:
+            client = pylt.LanguageToolClient(
+                server.base_url, languages_file=None, cache=MemoryCache(),
+                hooks=MultiHooks(stats, recorder)
+            )
+            errors = client.check(self.text, 'it', whitelist=['frase'])
+            client.check(self.text, 'it')
+            client.close()
+        totals = stats.snapshot()
+        self.assertEqual(totals['requests'], 1)
+        self.assertEqual(totals['failed'], 0)
+        self.assertEqual(totals['cache_hits'], 1)
+        self.assertEqual(totals['cache_misses'], 1)
+        self.assertEqual(totals['chars'], 2 * len(self.text))
+        self.assertEqual(totals['matches'], 2 * len(errors))
+        self.assertEqual(totals['errors'], 2 * len(errors))
+        self.assertGreater(totals['bytes_sent'], len(self.text))
+        self.assertGreater(totals['bytes_received'], 0)
+        self.assertGreater(totals['request_seconds'], 0)
+        self.assertEqual(recorder.calls, [('cache', False),
+                                          ('request', 'POST', 200),
+                                          ('cache', True)])
+
+    def test_failed_request(self):
+        stats = StatsHooks()
+        with MockLanguageTool(error_rate=1, error_statuses=(500, )) as server:
+            client = pylt.LanguageToolClient(server.base_url,
+                                             languages_file=None,
+                                             hooks=stats)
+            self.assertRaises(pylt.PyLangToolWrapperRetryableException,
+                              client.check, self.text, 'it')
+            client.close()
+        self.assertEqual(stats.snapshot()['failed'], 1)
+
+    def test_stream_and_file(self):
+        stats = StatsHooks()
+        with MockLanguageTool() as server, \
+                tempfile.TemporaryDirectory() as folder:
+            fn = os.path.join(folder, 'text.txt')
+            with open(fn, mode='w', encoding='utf-8') as fh:
+                fh.write(self.text)
+            client = pylt.LanguageToolClient(server.base_url,
+                                             languages_file=None,
+                                             hooks=stats)
+            errors = list(client.check_stream(io.StringIO(self.text), 'it',
+                                              max_chars_per_req=200))
+            errors += list(client.check_file(fn, 'it',
+                                             max_chars_per_req=200))
+            client.close()
+        totals = stats.snapshot()
+        self.assertGreater(totals['requests'], 2)
+        self.assertEqual(totals['errors'], len(errors))
+        self.assertGreater(totals['parse_seconds'], 0)
+
+    @unittest.skipIf(aio.aiohttp is None, 'aiohttp not installed')
+    def test_async_check(self):
+        stats, recorder = StatsHooks(), _Recorder()
+
+        async def run(client):
+            async with client:
+                errors = await client.check(self.text, 'it',
+                                            whitelist=['frase'])
+                await client.check(self.text, 'it')
+                return errors
+
+        with MockLanguageTool() as server:
+            errors = asyncio.run(run(aio.AsyncLanguageToolClient(
+                server.base_url, cache=MemoryCache(),
+                hooks=MultiHooks(stats, recorder))))
+        totals = stats.snapshot()
+        self.assertEqual(totals['requests'], 1)
+        self.assertEqual(totals['chars'], 2 * len(self.text))
+        self.assertEqual(totals['errors'], 2 * len(errors))
+        self.assertGreater(totals['bytes_sent'], len(self.text))
+        self.assertGreater(totals['bytes_received'], 0)
+        self.assertGreater(totals['parse_seconds'], 0)
+        self.assertEqual(recorder.calls, [('cache', False),
+                                          ('request', 'POST', 200),
+                                          ('cache', True)])
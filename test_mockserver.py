@@ -0,0 +1,52 @@
+# test_mockserver
+
+import unittest
+import pylangtoolwrapper as pylt
+from mockserver import MockLanguageTool, make_matches
+
+__doc__ = """test_mockserver"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class TestMakeMatches(unittest.TestCase):
+
+    def test_size_proportional(self):
+        text = 'parola ' * 1000
+        self.assertEqual(len(make_matches(text, 70)), 100)
+        for match in make_matches(text, 70):
+            context = match['context']
+            word = context['text'][context['offset']:
+                                   context['offset'] + context['length']]
+            self.assertEqual(
+                text[match['offset']:match['offset'] + match['length']], word
+            )
+
+
+class TestMockLanguageTool(unittest.TestCase):
+
+    def test_languages_and_check(self):
+        with MockLanguageTool() as server:
+            client = pylt.LanguageToolClient(server.base_url,
+                                             languages_file=None)
+            self.assertIsNotNone(client.get_language('it'))
+            errors = client.check('Una frase da controllare. ' * 20, 'it')
+            client.close()
+        self.assertEqual(len(errors), 520 // 80 + 1)
+        self.assertEqual(server.requests, 2)
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(server.peak_in_flight, 1)
+
+    def test_error_injection(self):
+        with MockLanguageTool(error_rate=1, error_statuses=(500, ),
+                              seed=1) as server:
+            client = pylt.LanguageToolClient(
+                server.base_url, languages_file=None,
+                retry=pylt.RetryPolicy(retries=2, backoff=0)
+            )
+            self.assertRaises(pylt.PyLangToolWrapperRetryableException,
+                              client.check, 'testo', 'it')
+            client.close()
+        self.assertEqual(server.requests, 3)
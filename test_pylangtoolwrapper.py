@@ -1,9 +1,13 @@
 # test_pylangtoolwrapper
 
+import io
 import json
 import os
+import tempfile
 import unittest
 import pylangtoolwrapper as pylt
+from mockserver import MockLanguageTool
+from testhelpers import FakeClient
 
 __doc__ = """test_pylangtoolwrapper"""
 __version__ = "0.1"
@@ -17,8 +21,24 @@ LANG = 'it'
 CACHED = 'errors.json'
 
 class TestPylangToolWrapper(unittest.TestCase):
+    """Against the local mock server, no network"""
     cached = None
 
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockLanguageTool().start()
+        cls.previous = pylt._client
+        pylt.set_client(pylt.LanguageToolClient(cls.server.base_url,
+                                                languages_file=None))
+        cls._tmp = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls):
+        pylt.get_client().close()
+        pylt._client = cls.previous
+        cls.server.stop()
+        cls._tmp.cleanup()
+
     def setUp(self):
         with open(os.path.join(TEST_FOLDER, TEXT_IT)) as fh:
             self.test_it = fh.read()
@@ -30,14 +50,14 @@ class TestPylangToolWrapper(unittest.TestCase):
         self.assertRaises(
             pylt.PyLangToolWrapperException,
             pylt._get_req,
-            f"{pylt.ROUTES['base']}ceck"
+            f"{self.server.base_url}ceck"
         )
 
     def test_bad_verb(self):
         self.assertRaises(
             pylt.PyLangToolWrapperException,
             pylt._get_req,
-            f"{pylt.ROUTES['base']}check",
+            f"{self.server.base_url}check",
             'DELETE'
         )
 
@@ -52,13 +72,300 @@ class TestPylangToolWrapper(unittest.TestCase):
         )
 
     def _get_check(self):
-        cached = os.path.join(TEST_FOLDER, CACHED)
+        cached = os.path.join(self._tmp.name, CACHED)
         if not os.path.exists(cached):
+            client = pylt.get_client()
+            resp = pylt._get_req(client.url('check'), 'POST',
+                                 {'text': self.test_it, 'language': LANG})
             with open(cached, mode='w') as fh:
-                json.dump(pylt.check(self.test_it, LANG), fh)
+                json.dump(resp.json(), fh)
         with open(cached) as fh:
-            return json.load(fh.read())
+            TestPylangToolWrapper.cached = json.load(fh)
+        return TestPylangToolWrapper.cached
 
     def test_check_ok_retreival(self):
         self._get_check()
         self.assertTrue('matches' in TestPylangToolWrapper.cached)
+        errors = pylt.check(self.test_it, LANG)
+        self.assertEqual(len(errors),
+                         len(TestPylangToolWrapper.cached['matches']))
+
+
+class TestClient(unittest.TestCase):
+
+    def test_connection_reused(self):
+        with MockLanguageTool() as server:
+            with pylt.LanguageToolClient(server.base_url,
+                                         languages_file=None) as client:
+                client.get_languages()
+                for _ in range(3):
+                    client.check('Una frase da controllare.', 'it')
+            self.assertEqual(server.requests, 4)
+            self.assertEqual(server.connections, 1)
+
+    def test_no_keep_alive(self):
+        with MockLanguageTool() as server:
+            with pylt.LanguageToolClient(server.base_url, keep_alive=False,
+                                         languages_file=None) as client:
+                for _ in range(3):
+                    client.check('Una frase da controllare.', 'it')
+            self.assertEqual(server.connections, 3)
+
+
+class TestChunkWorkers(unittest.TestCase):
+    text = 'Una frase da controllare, con qualche errore qua e là. ' * 100
+
+    def _check(self, server, **kwargs):
+        with pylt.LanguageToolClient(server.base_url, languages_file=None,
+                                     **kwargs.pop('client', {})) as client:
+            return [error.absolute_position() for error in client.check(
+                self.text, 'it', max_chars_per_req=500, chunk=True, **kwargs)]
+
+    def test_same_order_as_serial(self):
+        with MockLanguageTool() as server:
+            serial = self._check(server)
+        # latency grows with the size, the short last chunk ends first
+        with MockLanguageTool(latency_per_char=0.00002) as server:
+            parallel = self._check(server, workers=6)
+            self.assertGreater(server.peak_in_flight, 1)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(parallel, sorted(parallel))
+
+    def test_max_in_flight(self):
+        with MockLanguageTool(latency=0.01) as server:
+            self._check(server, workers=8, client={'max_in_flight': 2})
+            self.assertGreater(server.requests, 8)
+            self.assertEqual(server.peak_in_flight, 2)
+
+
+class TestSplitText(unittest.TestCase):
+    text = ('First sentence here. Second one follows.\n\n'
+            'Another paragraph, with a longer sentence in it. And more.\n'
+            'Last line without a final stop')
+
+    def test_chunks_rebuild_text(self):
+        chunks = pylt.split_text(self.text, 30)
+        self.assertEqual(''.join(chunk for _, chunk in chunks), self.text)
+        for offset, chunk in chunks:
+            self.assertLessEqual(len(chunk), 30)
+            self.assertEqual(self.text[offset:offset + len(chunk)], chunk)
+
+    def test_cut_on_paragraph(self):
+        chunks = pylt.split_text(self.text, 60)
+        self.assertEqual(
+            chunks[0][1], 'First sentence here. Second one follows.\n\n'
+        )
+
+    def test_no_tiny_chunk_after_title(self):
+        text = 'Titolo\n\n' + 'Una frase qualsiasi, non troppo corta. ' * 2000
+        chunks = pylt.split_text(text, 20000)
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(''.join(chunk for _, chunk in chunks), text)
+        for _, chunk in chunks[:-1]:
+            self.assertGreater(len(chunk), 10000)
+            self.assertTrue(chunk.endswith('. '))
+
+    def test_short_text_single_chunk(self):
+        self.assertEqual(pylt.split_text('short', 30), [(0, 'short')])
+
+    def test_rebase(self):
+        matches = [{'offset': 3, 'length': 2}]
+        self.assertEqual(pylt._rebase(matches, 10)[0]['offset'], 13)
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self._data = data
+        self.content = json.dumps(data).encode('utf-8')
+
+    def json(self):
+        return self._data
+
+
+class _OfflineClient(pylt.LanguageToolClient):
+    """Answers the languages route without network, counting the requests"""
+    requests = 0
+
+    def request(self, url, verb='GET', payload=None, ua=None):
+        _OfflineClient.requests += 1
+        return _FakeResponse([
+            {'name': 'English', 'code': 'en', 'longCode': 'en'},
+            {'name': 'English (US)', 'code': 'en', 'longCode': 'en-US'},
+            {'name': 'Italian', 'code': 'it', 'longCode': 'it-IT'},
+        ])
+
+
+class TestLanguagesCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.fn = os.path.join(self._tmp.name, 'languages.json')
+        _OfflineClient.requests = 0
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_fetched_once(self):
+        client = _OfflineClient(languages_file=self.fn)
+        client.get_languages().append(None)
+        self.assertEqual(len(client.get_languages()), 3)
+        _OfflineClient(languages_file=self.fn).get_languages()
+        self.assertEqual(_OfflineClient.requests, 1)
+
+    def test_expired(self):
+        _OfflineClient(languages_file=self.fn).get_languages()
+        client = _OfflineClient(languages_file=self.fn, languages_ttl=-1)
+        client.get_languages()
+        self.assertEqual(_OfflineClient.requests, 2)
+
+    def test_index(self):
+        client = _OfflineClient(languages_file=None)
+        self.assertEqual(client.get_language('en').long_code, 'en')
+        self.assertEqual(client.get_language('it').name, 'Italian')
+        self.assertEqual(client.get_language('en-US').name, 'English (US)')
+        self.assertIsNone(client.get_language('xx'))
+
+
+class TestCheckStream(unittest.TestCase):
+    text = '\n'.join(f'Riga {pos} con xx. Altra frase è qui.'
+                     for pos in range(100))
+
+    def _check(self, fileobj):
+        client = FakeClient()
+        errors = list(client.check_stream(fileobj, 'it',
+                                          max_chars_per_req=200))
+        self.assertEqual(len(errors), 100)
+        for error in errors:
+            start, end, _ = error.absolute_position()
+            self.assertEqual(self.text[start:end], 'xx')
+        self.assertGreater(len(client.sent), 1)
+
+    def test_text_stream(self):
+        self._check(io.StringIO(self.text))
+
+    def test_binary_stream(self):
+        self._check(io.BytesIO(self.text.encode('utf-8')))
+
+
+class TestCheckMany(unittest.TestCase):
+
+    def test_packing(self):
+        texts = [f'Titolo {pos} con xx' for pos in range(50)]
+        texts += ['', 'z' * 30 + ' xx ' + 'y' * 300]
+        client = FakeClient()
+        results = client.check_many(texts, 'it', max_chars_per_req=200)
+        self.assertEqual(len(results), len(texts))
+        self.assertLess(len(client.sent), len(texts))
+        self.assertEqual(results[-2], [])
+        for text, errors in zip(texts, results):
+            self.assertTrue(errors or not text)
+            for error in errors:
+                start, end, _ = error.absolute_position()
+                self.assertEqual(text[start:end], 'xx')
+
+    def test_straddling_dropped(self):
+        # 'ab' + separator + 'cd': one match in each text, one across
+        matches = [{'offset': 0, 'length': 2}, {'offset': 1, 'length': 4},
+                   {'offset': 5, 'length': 1}]
+        results = pylt._unpack(matches, [0, 4], [2, 2])
+        self.assertEqual(results, [[{'offset': 0, 'length': 2}],
+                                   [{'offset': 1, 'length': 1}]])
+
+
+class TestCheckFile(unittest.TestCase):
+
+    def test_byte_offsets(self):
+        text = '\n'.join(f'Riga è {pos} con xx. Perché sì.'
+                         for pos in range(100))
+        data = text.encode('utf-8')
+        with tempfile.TemporaryDirectory() as folder:
+            fn = os.path.join(folder, 'text.txt')
+            with open(fn, mode='wb') as fh:
+                fh.write(data)
+            client = FakeClient()
+            found = list(client.check_file(fn, 'it', max_chars_per_req=200))
+        self.assertEqual(len(found), 100)
+        for byte_start, byte_end, error in found:
+            start, end, _ = error.absolute_position()
+            self.assertEqual(text[start:end], 'xx')
+            self.assertEqual(data[byte_start:byte_end], b'xx')
+
+    def test_no_tiny_window_after_title(self):
+        text = 'Titolo\n\n' + 'Una frase … qualsiasi, non corta. ' * 2000
+        with tempfile.TemporaryDirectory() as folder:
+            fn = os.path.join(folder, 'text.txt')
+            with open(fn, mode='w', encoding='utf-8') as fh:
+                fh.write(text)
+            client = FakeClient()
+            list(client.check_file(fn, 'it', max_chars_per_req=20000))
+        self.assertEqual(''.join(client.sent), text)
+        for sent in client.sent[:-1]:
+            self.assertGreater(len(sent.encode('utf-8')), 10000)
+            self.assertTrue(sent.endswith('. '))
+
+
+class _FlakyClient(pylt.LanguageToolClient):
+    """Fails `failures` times before answering"""
+
+    def __init__(self, failures, **kwargs):
+        pylt.LanguageToolClient.__init__(self, **kwargs)
+        self.failures = failures
+        self.sent = 0
+
+    def _send(self, url, verb, payload, ua):
+        self.sent += 1
+        if self.sent <= self.failures:
+            raise pylt.PyLangToolWrapperRetryableException('Error 502', 502)
+        return _FakeResponse({'matches': []})
+
+
+class TestRetry(unittest.TestCase):
+    policy = pylt.RetryPolicy(retries=2, backoff=0.001)
+
+    def test_retried(self):
+        client = _FlakyClient(2, retry=self.policy, languages_file=None)
+        self.assertEqual(client.check('testo', 'it'), [])
+        self.assertEqual(client.sent, 3)
+
+    def test_gives_up(self):
+        client = _FlakyClient(3, retry=self.policy, languages_file=None)
+        self.assertRaises(pylt.PyLangToolWrapperRetryableException,
+                          client.check, 'testo', 'it')
+        self.assertEqual(client.sent, 3)
+
+    def test_not_idempotent(self):
+        client = _FlakyClient(1, retry=self.policy, languages_file=None)
+        self.assertRaises(pylt.PyLangToolWrapperRetryableException,
+                          client.request, 'url', 'POST', {})
+
+    def test_budget(self):
+        policy = pylt.RetryPolicy(retries=5, backoff=10, budget=0)
+        self.assertGreaterEqual(policy.delay(0, retry_after=1), 1)
+        client = _FlakyClient(1, retry=policy, languages_file=None)
+        self.assertRaises(pylt.PyLangToolWrapperRetryableException,
+                          client.get_languages)
+
+    def test_requests_errors_wrapped(self):
+        with MockLanguageTool() as server:
+            client = pylt.LanguageToolClient(server.base_url,
+                                             retry=self.policy,
+                                             languages_file=None)
+            post = client._session.post
+            raised = [pylt.requests.exceptions.ChunkedEncodingError('reset')]
+
+            def flaky_post(*args, **kwargs):
+                if raised:
+                    raise raised.pop()
+                return post(*args, **kwargs)
+
+            client._session.post = flaky_post
+            self.assertTrue(client.check('Una frase da controllare.', 'it'))
+            raised.append(pylt.requests.exceptions.InvalidURL('bad'))
+            self.assertRaises(pylt.PyLangToolWrapperFatalException,
+                              client.check, 'testo', 'it')
+            client.close()
+
+    def test_bad_verb_is_fatal(self):
+        client = pylt.LanguageToolClient(languages_file=None)
+        self.assertRaises(pylt.PyLangToolWrapperFatalException,
+                          client.request, 'url', 'DELETE')
@@ -0,0 +1,82 @@
+# test_ratelimit
+
+import time
+import unittest
+import pylangtoolwrapper as pylt
+import ratelimit
+from mockserver import MockLanguageTool
+
+__doc__ = """test_ratelimit"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class TestRateLimit(unittest.TestCase):
+
+    def test_parse_retry_after(self):
+        self.assertEqual(ratelimit.parse_retry_after('3'), 3.0)
+        self.assertIsNone(ratelimit.parse_retry_after(None))
+        self.assertIsNone(ratelimit.parse_retry_after('soon'))
+        self.assertEqual(
+            ratelimit.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+
+    def test_token_bucket_waits(self):
+        bucket = ratelimit.TokenBucket(6000, capacity=1)  # 100 per second
+        bucket.acquire()
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_pause(self):
+        limiter = ratelimit.RateLimiter(60000, None)
+        limiter.pause(0.05)
+        self.assertGreaterEqual(limiter.acquire(), 0.04)
+
+    def test_aimd(self):
+        concurrency = ratelimit.AdaptiveConcurrency(initial=8, maximum=9)
+        concurrency.acquire()
+        concurrency.release(429)
+        self.assertEqual(concurrency.limit, 4)
+        for _ in range(40):
+            concurrency.acquire()
+            concurrency.release(200)
+        self.assertEqual(concurrency.limit, 9)
+        self.assertEqual(concurrency.in_flight, 0)
+
+
+class TestClientThrottled(unittest.TestCase):
+
+    def _client(self, server, retry=None):
+        return pylt.LanguageToolClient(
+            server.base_url, languages_file=None, retry=retry,
+            rate_limiter=ratelimit.RateLimiter(6000, None),
+            concurrency=ratelimit.AdaptiveConcurrency(initial=4)
+        )
+
+    def test_429(self):
+        with MockLanguageTool(error_rate=1, error_statuses=(429, ),
+                              retry_after='1') as server:
+            with self._client(server) as client:
+                with self.assertRaises(pylt.PyLangToolWrapperRateLimited) \
+                        as caught:
+                    client.check('testo', 'it')
+        self.assertEqual(caught.exception.status, 429)
+        self.assertEqual(caught.exception.retry_after, 1.0)
+        self.assertEqual(client.concurrency.limit, 2)
+        self.assertEqual(client.concurrency.in_flight, 0)
+        # the limiter holds the next requests for Retry-After
+        self.assertGreater(client.rate_limiter.requests._paused_until,
+                           time.monotonic() + 0.5)
+
+    def test_retry_waits_retry_after(self):
+        with MockLanguageTool(error_rate=1, error_statuses=(429, ),
+                              retry_after='0.2') as server:
+            with self._client(server, pylt.RetryPolicy(1, 0)) as client:
+                start = time.monotonic()
+                self.assertRaises(pylt.PyLangToolWrapperRateLimited,
+                                  client.check, 'testo', 'it')
+            self.assertGreaterEqual(time.monotonic() - start, 0.2)
+            self.assertEqual(server.requests, 2)
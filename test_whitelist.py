@@ -0,0 +1,98 @@
+# test_whitelist
+
+import unittest
+from whitelist import Whitelist
+
+__doc__ = """test_whitelist"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+
+class TestWhitelist(unittest.TestCase):
+
+    def test_casefold(self):
+        wl = Whitelist(['Straße', ' LanguageTool ', ''])
+        self.assertIn('STRASSE', wl)
+        self.assertIn('languagetool', wl)
+        self.assertEqual(len(wl), 2)
+
+    def test_versioning(self):
+        wl = Whitelist(['uno'])
+        wl.add('due')
+        wl.add('Due')
+        self.assertEqual(wl.version, 1)
+        wl.remove('uno', 'tre')
+        wl.merge(Whitelist(['quattro']))
+        self.assertEqual(wl.version, 3)
+        self.assertEqual(sorted(wl), ['due', 'quattro'])
+
+    def test_coerce(self):
+        wl = Whitelist(['uno'])
+        self.assertIs(Whitelist.coerce(wl), wl)
+        self.assertIn('uno', Whitelist.coerce(['UNO']))
+        self.assertFalse(Whitelist.coerce(None))
+
+    def test_plain_list_literal(self):
+        wl = Whitelist.coerce(['@mention', 'c[x]', 'foo*'])
+        for word in ('@Mention', 'c[x]', 'foo*'):
+            self.assertIn(word, wl)
+        self.assertNotIn('cx', wl)
+        self.assertNotIn('food', wl)
+        wl.add('bar*')
+        self.assertNotIn('bart', wl)
+        self.assertIn('c[x]', Whitelist(wl))
+
+    def test_rule_without_entry(self):
+        self.assertRaises(ValueError, Whitelist, ['@MORFOLOGIK_RULE_IT_IT'])
+
+
+class TestWhitelistPatterns(unittest.TestCase):
+
+    def setUp(self):
+        self.wl = Whitelist(['#*', 'SKU-[0-9]*-??', r're:v\d+(\.\d+)*',
+                             '@MORFOLOGIK_RULE_IT_IT ciaone', 'parola'])
+
+    def test_prefix(self):
+        self.assertIn('#Python', self.wl)
+        self.assertNotIn('Python', self.wl)
+
+    def test_glob_and_regex(self):
+        self.assertIn('sku-12-ab', self.wl)
+        self.assertNotIn('sku-12-abc', self.wl)
+        self.assertIn('V1.2.3', self.wl)
+        self.assertNotIn('v1.2x', self.wl)
+
+    def test_patterns_by_prefix(self):
+        wl = Whitelist([r're:ab?c', r're:x|y', '*ing', 'ab[0-9]',
+                        r're:v\d+'])
+        for word in ('ac', 'abc', 'x', 'y', 'testing', 'AB1', 'v2'):
+            self.assertIn(word, wl)
+        for word in ('abbc', 'xy', 'ab', 'v'):
+            self.assertNotIn(word, wl)
+
+    def test_invalid_regex(self):
+        wl = Whitelist(['ok'])
+        for entry in ('re:(', 're:(?s)a.b', 're:a(?i)b', 're:(?P<x>a)',
+                      r're:(a)\1'):
+            self.assertRaises(ValueError, wl.add, entry)
+        self.assertIn('ok', wl)
+
+    def test_regex_case_flag(self):
+        wl = Whitelist(['re:(?i)foo', 're:(?i)bar'])
+        self.assertEqual(set(wl), {'re:foo', 're:bar'})
+        self.assertIn('FOO', wl)
+        self.assertNotIn('baz', wl)
+
+    def test_rule_scope(self):
+        self.assertNotIn('ciaone', self.wl)
+        self.assertTrue(self.wl.matches('Ciaone', 'MORFOLOGIK_RULE_IT_IT'))
+        self.assertTrue(self.wl.matches('parola', 'OTHER_RULE'))
+
+    def test_entries_round_trip(self):
+        self.assertEqual(Whitelist(self.wl)._entries, self.wl._entries)
+        self.wl.remove('#*')
+        self.wl.remove('ciaone', rule_id='MORFOLOGIK_RULE_IT_IT')
+        self.assertNotIn('#python', self.wl)
+        self.assertEqual(len(self.wl), 3)
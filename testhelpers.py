@@ -0,0 +1,37 @@
+# testhelpers.py
+
+import re
+
+import pylangtoolwrapper as pylt
+
+__doc__ = """Helpers shared by the tests"""
+__version__ = "0.1"
+__changelog__ = """
+
+"""
+
+_ERROR = re.compile(r'\bxx\w*')
+
+
+class FakeClient(pylt.LanguageToolClient):
+    """
+    Reports every word starting with `xx` as an error, without network.
+    The texts sent are kept in `sent`
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('languages_file', None)
+        pylt.LanguageToolClient.__init__(self, **kwargs)
+        self.sent = list()
+
+    def fetch_matches(self, text, lang_code, options=None):
+        self.sent.append(text)
+        return [{'offset': match.start(), 'length': len(match.group()),
+                 'message': '',
+                 'context': {'text': text, 'offset': match.start(),
+                             'length': len(match.group())}}
+                for match in _ERROR.finditer(text)]
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,286 @@
+# whitelist.py
+
+from fnmatch import translate
+import re
+from typing import Union, Dict, Iterable, Iterator, Tuple
+
+__doc__ = """Words to ignore in the check results.
+
+Besides plain words a whitelist entry can be:
+
+- `prefix*`: every word starting with `prefix` (i.e. `#*` for hashtags)
+- a glob pattern with `*`, `?` or `[...]` (i.e. `SKU-[0-9]*-??`)
+- `re:regex`: a regular expression matching the whole word, without global
+  flags (but `(?i)`), named groups or backreferences
+- any of the above preceded by `@RULE_ID `, applied only to the errors of
+  that rule (i.e. `@MORFOLOGIK_RULE_IT_IT foo`)
+
+Everything is case insensitive. The patterns apply only to the entries of a
+`Whitelist`: a plain list of words (i.e. the one saved by the GUI) passed to
+`check()` is taken literally.
+"""
+__version__ = "0.2"
+__changelog__ = """
+0.2 prefix, glob, regex and rule scoped entries
+"""
+
+WORD, PREFIX, GLOB, REGEX = 'word', 'prefix', 'glob', 'regex'
+
+# (kind, value, rule id or `None`)
+Entry = Tuple[str, str, Union[str, None]]
+
+_GLOB_CHARS = re.compile(r'[*?\[]')
+_END = None  # marks the end of a prefix in the trie
+_PATTERNS = ''  # the patterns of a node in the trie of the patterns
+_REGEX_SPECIAL = frozenset('.^$*+?{}[]\\|()')
+# Leading inline flags, global to the regex; the regexes of a whitelist are
+# joined in a single one, they would apply to all of them
+_GLOBAL_FLAGS = re.compile(r'\(\?([aiLmsux]+)\)')
+# Named groups and backreferences change meaning once the regexes are joined
+_GROUP_REFS = re.compile(r'\(\?P[<=]|(?<!\\)(?:\\\\)*\\(?:[1-9]|g<)')
+
+
+def parse_entry(text: str) -> Union[Entry, None]:
+    """
+    :param text: a whitelist entry, see the module doc
+    :return: (kind, value, rule id) or `None` if `text` is empty
+    :raise ValueError: for a rule without the entry or an invalid regex
+    """
+    text = text.strip()
+    rule_id = None
+    if text.startswith('@'):
+        rule_id, _, text = text[1:].partition(' ')
+        text = text.strip()
+        if not text:
+            raise ValueError(f'No entry for the rule @{rule_id}')
+    if not text:
+        return None
+    if text.startswith('re:'):
+        return REGEX, _check_regex(text[3:]), rule_id
+    text = text.casefold()
+    if not _GLOB_CHARS.search(text):
+        return WORD, text, rule_id
+    if text.endswith('*') and not _GLOB_CHARS.search(text[:-1]):
+        return PREFIX, text[:-1], rule_id
+    return GLOB, text, rule_id
+
+
+def _check_regex(regex: str) -> str:
+    """
+    :return: `regex` without a leading `(?i)`, all the entries are case
+             insensitive anyway
+    :raise ValueError: if `regex` does not compile alone or would break the
+                       other regexes once joined to them
+    """
+    flags = _GLOBAL_FLAGS.match(regex)
+    if flags is not None:
+        if flags.group(1) != 'i':
+            raise ValueError(f'Global flags in re:{regex}, use a group '
+                             f'as (?{flags.group(1)}:...)')
+        regex = regex[flags.end():]
+    try:
+        re.compile(regex)
+    except re.error as exc:
+        raise ValueError(f'Invalid re:{regex}: {exc}') from None
+    if _GROUP_REFS.search(regex):
+        raise ValueError(f'Named groups and backreferences are not allowed '
+                         f'in re:{regex}')
+    return regex
+
+
+def format_entry(entry: Entry) -> str:
+    """The text of `entry`, `parse_entry()` gives it back"""
+    kind, value, rule_id = entry
+    text = {PREFIX: f'{value}*', REGEX: f're:{value}'}.get(kind, value)
+    return f'@{rule_id} {text}' if rule_id else text
+
+
+def _regex_prefix(regex: str) -> str:
+    """The literal text every match of `regex` starts with, may be empty"""
+    if '|' in regex:
+        return ''
+    prefix = list()
+    for char in regex:
+        if char in _REGEX_SPECIAL:
+            if char in '*?{' and prefix:
+                prefix.pop()  # the last char is optional or repeated
+            break
+        prefix.append(char)
+    return ''.join(prefix).casefold()
+
+
+class _Matcher:
+    """
+    Compiled entries of a single scope: a set for the words, a trie for the
+    prefixes and a trie of the globs and regexes keyed by their literal
+    prefix. A lookup tries only the patterns whose prefix the word starts
+    with, those without a literal prefix (i.e. `*foo`) are always tried
+    """
+
+    def __init__(self, entries: Iterable[Entry]):
+        self.words = set()
+        self.trie = dict()
+        grouped = dict()
+        for kind, value, _ in entries:
+            if kind == WORD:
+                self.words.add(value)
+            elif kind == PREFIX:
+                node = self.trie
+                for char in value:
+                    node = node.setdefault(char, dict())
+                node[_END] = True
+            elif kind == GLOB:
+                prefix = value[:_GLOB_CHARS.search(value).start()]
+                grouped.setdefault(prefix, list()).append(translate(value))
+            else:
+                grouped.setdefault(_regex_prefix(value), list()).append(
+                    f'(?:{value})\\Z')
+        self.patterns = dict()
+        for prefix, patterns in grouped.items():
+            node = self.patterns
+            for char in prefix:
+                node = node.setdefault(char, dict())
+            node[_PATTERNS] = re.compile(
+                '|'.join(f'(?:{pattern})' for pattern in patterns),
+                re.IGNORECASE)
+
+    def match(self, word: str) -> bool:
+        """:param word: already casefolded"""
+        if word in self.words:
+            return True
+        node = self.trie
+        if node:
+            for char in word:
+                if _END in node:
+                    return True
+                node = node.get(char)
+                if node is None:
+                    break
+            else:
+                if _END in node:
+                    return True
+        node = self.patterns
+        for pos in range(len(word) + 1):
+            regex = node.get(_PATTERNS)
+            if regex is not None and regex.match(word) is not None:
+                return True
+            if pos == len(word):
+                break
+            node = node.get(word[pos])
+            if node is None:
+                break
+        return False
+
+
+class Whitelist:
+    """
+    Set of entries to ignore, see the module doc.
+
+    The entries are kept in a `frozenset` which is replaced, never changed,
+    by `add()`/`remove()`/`merge()`, so a lookup running in another thread
+    always sees a consistent set. Every change increments `version`
+    """
+
+    def __init__(self, words: Iterable[str] = (), patterns: bool = True):
+        """
+        :param words: the entries to ignore, empty ones are skipped. Another
+                      `Whitelist` is copied as it is
+        :param patterns: if `False` every entry is a plain word, even with
+                         `*`, `[` or a leading `@`
+        """
+        self.patterns = patterns
+        if isinstance(words, Whitelist):
+            self._entries = words._entries
+        else:
+            self._entries = frozenset(self._parse(words))
+        self._matchers: Union[Dict[Union[str, None], _Matcher], None] = None
+        self.version = 0
+
+    def _parse(self, words: Iterable[str],
+               rule_id: Union[str, None] = None) -> Iterator[Entry]:
+        for word in words:
+            if self.patterns:
+                entry = parse_entry(word)
+            else:
+                word = word.strip()
+                entry = (WORD, word.casefold(), None) if word else None
+            if entry is None:
+                continue
+            if rule_id is not None:
+                entry = entry[0], entry[1], rule_id
+            yield entry
+
+    @classmethod
+    def coerce(cls, whitelist: Union['Whitelist', Iterable[str], None]
+               ) -> 'Whitelist':
+        """
+        :param whitelist: `Whitelist` or plain words, taken literally
+        :return: `whitelist` itself if already a `Whitelist`
+        """
+        if isinstance(whitelist, cls):
+            return whitelist
+        return cls(whitelist or (), patterns=False)
+
+    def _compile(self) -> Dict[Union[str, None], _Matcher]:
+        matchers = self._matchers
+        if matchers is None:
+            scopes = dict()
+            for entry in self._entries:
+                scopes.setdefault(entry[2], list()).append(entry)
+            matchers = {rule_id: _Matcher(entries)
+                        for rule_id, entries in scopes.items()}
+            self._matchers = matchers
+        return matchers
+
+    def matches(self, word: str, rule_id: Union[str, None] = None) -> bool:
+        """
+        :param word: the text of an error
+        :param rule_id: the rule of the error, the entries scoped to this
+                        rule are checked too
+        :return: `True` if `word` is whitelisted
+        """
+        matchers = self._compile()
+        word = word.casefold()
+        matcher = matchers.get(None)
+        if matcher is not None and matcher.match(word):
+            return True
+        matcher = matchers.get(rule_id) if rule_id else None
+        return matcher is not None and matcher.match(word)
+
+    def __contains__(self, word: str) -> bool:
+        return self.matches(word)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return (format_entry(entry) for entry in self._entries)
+
+    def __bool__(self):
+        return bool(self._entries)
+
+    def _replace(self, entries: frozenset):
+        if entries != self._entries:
+            self._entries = entries
+            self._matchers = None
+            self.version += 1
+
+    def add(self, *words: str, rule_id: Union[str, None] = None):
+        """
+        Add `words` to the whitelist
+        :param words: entries, see the module doc
+        :param rule_id: apply the entries only to the errors of this rule
+        """
+        self._replace(self._entries.union(self._parse(words, rule_id)))
+
+    def remove(self, *words: str, rule_id: Union[str, None] = None):
+        """Remove `words` from the whitelist, missing ones are ignored"""
+        self._replace(self._entries.difference(self._parse(words, rule_id)))
+
+    def merge(self, other: Union['Whitelist', Iterable[str]]):
+        """Add all the entries of `other`, plain words if not a `Whitelist`"""
+        self._replace(self._entries.union(Whitelist.coerce(other)._entries))
+
+
+if __name__ == '__main__':
+    pass